@@ -9,7 +9,7 @@ from core.canonical_recipes import (
     SEASON_KEY_TO_RECIPE_SEASON,
 )
 
-from core.pricing_data import load_master_pricing
+from core.pricing_data import load_price_index
 
 from core.stem_scaling import calculate_stem_recipe
 
@@ -30,7 +30,15 @@ def normalize_pricing_season(recipe_season: str) -> str:
 BASE_DIR = Path(__file__).parent
 DATA_PATH = BASE_DIR / "data" / "CANONICAL Bouquet Recipe Master Sheet.xlsx"
 
-pricing_df = load_master_pricing(DATA_PATH)
+@st.cache_resource
+def get_price_index():
+    """
+    Build the per-season price index once per process.
+    """
+    return load_price_index(DATA_PATH)
+
+
+price_index = get_price_index()
 
 # --- Password gate ---
 APP_PASSWORD = st.secrets.get("BB_APP_PASSWORD")
@@ -284,27 +292,8 @@ if st.button("Lock in My Assumptions"):
         unsafe_allow_html=True
     )
 
-    # --- Season mapping for pricing ---
-    SEASON_MAP = {
-        "Early Spring": ["Early Spring"],
-        "Late Spring": ["Late Spring"],
-        "Summer/Fall": ["Summer/Fall"],
-    }
-
-    # --- Filter pricing data by recipe season ---
-    valid_seasons = SEASON_MAP[pricing_season]
-
-    season_pricing_df = pricing_df[
-        pricing_df["season_raw"].str.contains("|".join(valid_seasons), na=False)
-    ]
-
-    # --- Compute average price per category ---
-    category_avg_prices = (
-        season_pricing_df
-        .groupby("category")["wholesale_price"]
-        .mean()
-        .to_dict()
-    )
+    # --- Average price per category for the recipe season ---
+    category_avg_prices = price_index.avg_prices(pricing_season)
 
     # --- Compute estimated wholesale value ---
     estimated_wholesale_value = sum(
@@ -4,15 +4,20 @@ from pathlib import Path
 ROOT_DIR = Path(__file__).parent.parent
 sys.path.append(str(ROOT_DIR))
 
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 
-from core.optimization import optimize_bouquets
+from core.instrumentation import OptimizationCancelled, ProgressReporter, SearchStats
+from core.result_cache import cached_optimize_bouquets, get_default_cache
 from core.canonical_recipes import (
     SEASON_KEY_TO_RECIPE_SEASON,
     SEASON_KEY_TO_DISPLAY_LABEL,
     SEASON_KEY_TO_PRICING_LABEL,
 )
-from core.pricing_data import load_master_pricing
+from core.pricing_data import load_master_pricing, pricing_memory_report, PriceIndex
 from pathlib import Path
 
 
@@ -40,7 +45,16 @@ if "available_stems" not in st.session_state:
 # Load pricing data
 # -----------------------------
 
-pricing_df = load_master_pricing(DATA_PATH)
+@st.cache_resource
+def load_pricing():
+    """
+    Load pricing data and its per-season price index once per process.
+    """
+    pricing_df = load_master_pricing(DATA_PATH)
+    return pricing_df, PriceIndex.from_frame(pricing_df)
+
+
+pricing_df, price_index = load_pricing()
 
 # Build average wholesale price per category for selected season
 def get_avg_prices_for_season(season_key: str):
@@ -55,25 +69,7 @@ def get_avg_prices_for_season(season_key: str):
     # e.g. "summer_fall" -> "Summer/Fall"
     season_label = SEASON_KEY_TO_PRICING_LABEL[season_key]
 
-    def row_matches_season(season_raw: str) -> bool:
-        if not isinstance(season_raw, str):
-            return False
-
-        # Split comma-separated season entries
-        tokens = [s.strip() for s in season_raw.split(",")]
-
-        # Membership test (not equality of the full cell)
-        return season_label in tokens
-
-    df = pricing_df[
-        pricing_df["season_raw"].apply(row_matches_season)
-    ]
-
-    return (
-        df.groupby("category")["wholesale_price"]
-        .mean()
-        .to_dict()
-    )
+    return price_index.avg_prices(season_label)
 
 ####debug
 st.write("DEBUG unique seasons:", pricing_df["season_raw"].unique())
@@ -118,24 +114,129 @@ for cat in ["Foundation", "Filler", "Floater", "Finisher", "Focal", "Foliage"]:
 
 st.session_state.available_stems = available_stems
 
+show_diagnostics = st.checkbox(
+    "Show search diagnostics",
+    help="Phase timings and search counters (debug).",
+)
+
 # -----------------------------
 # Run optimization
 # -----------------------------
+#
+# The optimizer runs in a background thread so the page stays
+# responsive. The job (future, cancel event, latest progress) lives in
+# session_state, so reruns caused by other widgets neither restart nor
+# block it; a fragment polls it and reruns the page once it finishes.
+
+PROGRESS_POLL_SECONDS = 0.5
+
+
+@st.cache_resource
+def get_executor():
+    """
+    Thread pool shared by all sessions of this process.
+    """
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="optimizer")
+
+
+def start_optimization(avg_prices: dict, stats) -> None:
+    cancel_event = threading.Event()
+
+    # Written by the worker thread, read by the polling fragment
+    progress_state = {"phase": None, "nodes_expanded": 0, "best_bouquets": None}
+
+    progress = ProgressReporter(
+        callback=progress_state.update,
+        cancel_event=cancel_event,
+    )
+
+    future = get_executor().submit(
+        cached_optimize_bouquets,
+        available_stems=dict(available_stems),
+        season_key=season_key,
+        target_price=target_price,
+        avg_wholesale_prices=avg_prices,
+        stats=stats,
+        progress=progress,
+    )
+
+    st.session_state.optimizer_job = {
+        "future": future,
+        "cancel_event": cancel_event,
+        "progress": progress_state,
+        "started": time.perf_counter(),
+    }
+    st.session_state.pop("optimizer_result", None)
+
+
+@st.fragment(run_every=PROGRESS_POLL_SECONDS)
+def show_job_progress():
+    job = st.session_state.get("optimizer_job")
+
+    if job is None:
+        return
+
+    future = job["future"]
+
+    if future.done():
+        # Whatever the outcome, clear the job so the page is usable again
+        try:
+            result = future.result() or {
+                "error": "No feasible bouquet configuration at this price."
+            }
+        except OptimizationCancelled:
+            result = {"cancelled": True}
+        except Exception as exc:
+            result = {"error": f"Optimization failed: {exc}"}
+        finally:
+            del st.session_state.optimizer_job
+
+        st.session_state.optimizer_result = result
+        st.rerun()
+
+    progress = job["progress"]
+    elapsed = time.perf_counter() - job["started"]
+
+    with st.status("Searching for an optimal bouquet recipe...", expanded=True):
+        st.write(f"**Phase:** {progress['phase'] or 'starting'}")
+        st.write(f"**Search nodes expanded:** {progress['nodes_expanded']:,}")
+
+        if progress["best_bouquets"] is not None:
+            st.write(f"**Best bouquet count so far:** {progress['best_bouquets']}")
 
-if st.button("Optimize bouquets"):
+        st.caption(f"Running for {elapsed:.1f}s")
+
+        if job["cancel_event"].is_set():
+            st.caption("Cancelling...")
+        elif st.button("Cancel"):
+            job["cancel_event"].set()
+
+
+job_running = "optimizer_job" in st.session_state
+
+if st.button("Optimize bouquets", disabled=job_running):
 
     avg_prices = get_avg_prices_for_season(season_key)
 
     ### DEBUG CODE
     st.write("Avg wholesale prices:", avg_prices)
 
-    with st.status("Searching for an optimal bouquet recipe. Please be patient as this can take several minutes.", expanded=True):
-        result = optimize_bouquets(
-            available_stems=available_stems,
-            season_key=season_key,
-            target_price=target_price,
-            avg_wholesale_prices=avg_prices,
-        )
+    start_optimization(
+        avg_prices=avg_prices,
+        stats=SearchStats() if show_diagnostics else None,
+    )
+    job_running = True
+
+if job_running:
+    show_job_progress()
+
+result = st.session_state.get("optimizer_result")
+
+if result is not None:
+
+    if result.get("cancelled"):
+        st.warning("Optimization cancelled.")
+        st.stop()
 
    # Handle hard-stop errors from the optimizer
     if "error" in result:
@@ -173,3 +274,11 @@ if st.button("Optimize bouquets"):
     st.json(result["stranded_stems"])
 
     st.caption(f"Waste penalty score: {round(result['waste_penalty'], 2)}")
+
+    if show_diagnostics:
+        st.markdown("#### Search diagnostics")
+        st.json(result.get("stats", {}))
+        st.caption("Result cache")
+        st.json(get_default_cache().stats())
+        st.caption("Pricing frame memory")
+        st.json(pricing_memory_report(pricing_df))
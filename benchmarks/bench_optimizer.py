@@ -0,0 +1,481 @@
+"""
+Benchmark the optimizer pipeline on reproducible inventory scenarios.
+
+Scenarios are the cross product of season × target price × inventory
+scale × scarcity pattern. Each scenario is timed for:
+
+- optimize_bouquets          (full pipeline, Phases 3A–3F)
+- search_allocation          (Phase 3C.2 alone, as optimize_bouquets
+                              runs it for --search-mode)
+- expand_bouquet_to_target   (Phase 3D alone, at the searched count)
+
+A sweep check then times optimize_price_sweep over SWEEP_PRICES
+against a loop of optimize_bouquets calls on one inventory; the run
+fails (exit 1) if the sweep's rows differ from the loop's or it is
+less than SWEEP_MIN_SPEEDUP times faster.
+
+Timings are reported as percentiles over all scenarios and repeats;
+peak traced memory is measured in a separate pass so tracemalloc does
+not distort the timings. Results are written as JSON and can be
+compared against a previous run:
+
+    python benchmarks/bench_optimizer.py --output before.json
+    python benchmarks/bench_optimizer.py --output after.json --compare before.json
+
+Runs offline against the workbooks bundled in data/.
+"""
+
+import argparse
+import itertools
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from core.bouquet_expansion import expand_bouquet_to_target
+from core.bouquet_sizing import apply_percentage_bounds, estimate_bouquet_stem_count
+from core.canonical_recipes import (
+    CANONICAL_RECIPES,
+    SEASON_KEY_TO_PRICING_LABEL,
+    SEASON_KEY_TO_RECIPE_SEASON,
+)
+from core.optimization import (
+    SEARCH_MODES,
+    MIN_BB_STEMS,
+    _search_allocation,
+    build_tier_a_allocation,
+    optimize_bouquets,
+    optimize_price_sweep,
+)
+from core.pricing_data import load_price_index
+from core.recipe_bounds import VALID_CATEGORIES, get_percentage_bounds
+
+# -----------------------------
+# Scenario grid
+# -----------------------------
+
+SEASONS = ["early_spring", "late_spring", "summer_fall"]
+TARGET_PRICES = [15.0, 25.0, 40.0, 60.0]
+
+# Total stems across all categories
+INVENTORY_SCALES = [60, 600, 6_000, 60_000]
+
+# Share of the inventory per category, before jitter
+SCARCITY_PATTERNS = {
+    "balanced": {
+        "Focal": 0.20, "Foundation": 0.35, "Filler": 0.10,
+        "Floater": 0.10, "Finisher": 0.10, "Foliage": 0.15,
+    },
+    "no_filler": {
+        "Focal": 0.20, "Foundation": 0.40, "Filler": 0.0,
+        "Floater": 0.12, "Finisher": 0.12, "Foliage": 0.16,
+    },
+    "scarce_focal": {
+        "Focal": 0.03, "Foundation": 0.45, "Filler": 0.12,
+        "Floater": 0.12, "Finisher": 0.12, "Foliage": 0.16,
+    },
+    "supporting_only_foundation": {
+        "Focal": 0.25, "Foundation": 0.65, "Filler": 0.0,
+        "Floater": 0.0, "Finisher": 0.0, "Foliage": 0.10,
+    },
+    "foliage_heavy": {
+        "Focal": 0.15, "Foundation": 0.25, "Filler": 0.05,
+        "Floater": 0.05, "Finisher": 0.05, "Foliage": 0.45,
+    },
+}
+
+QUICK_GRID = {
+    "seasons": ["early_spring", "summer_fall"],
+    "prices": [25.0, 60.0],
+    "scales": [60, 6_000],
+    "patterns": ["balanced", "no_filler"],
+}
+
+
+def build_inventory(scale: int, pattern: str, seed: int) -> dict:
+    """
+    Deterministic inventory for a scenario: pattern shares with ±20%
+    jitter, rounded to whole stems.
+    """
+
+    rng = random.Random(seed)
+    shares = SCARCITY_PATTERNS[pattern]
+
+    return {
+        category: int(round(scale * shares[category] * rng.uniform(0.8, 1.2)))
+        for category in VALID_CATEGORIES
+    }
+
+
+def build_scenarios(quick: bool = False) -> list:
+    if quick:
+        grid = (
+            QUICK_GRID["seasons"],
+            QUICK_GRID["prices"],
+            QUICK_GRID["scales"],
+            QUICK_GRID["patterns"],
+        )
+    else:
+        grid = (SEASONS, TARGET_PRICES, INVENTORY_SCALES, list(SCARCITY_PATTERNS))
+
+    scenarios = []
+
+    for seed, (season, price, scale, pattern) in enumerate(itertools.product(*grid)):
+        scenarios.append({
+            "name": f"{season}/${price:g}/{scale}/{pattern}",
+            "season_key": season,
+            "target_price": price,
+            "scale": scale,
+            "pattern": pattern,
+            "available_stems": build_inventory(scale, pattern, seed),
+        })
+
+    return scenarios
+
+
+# Sweep check: $10–$75 in 50¢ steps on one mid-sized inventory
+SWEEP_PRICES = [10.0 + 0.5 * i for i in range(131)]
+SWEEP_SCENARIO = {"season_key": "summer_fall", "scale": 600, "pattern": "balanced"}
+SWEEP_MIN_SPEEDUP = 1.5
+
+
+# -----------------------------
+# Benchmarked calls
+# -----------------------------
+
+def prepare_phase_inputs(scenario: dict, avg_prices: dict) -> dict | None:
+    """
+    Recompute the Phase 3A–3C.1 inputs so the search and expansion can
+    be timed on their own. Returns None for scenarios that hit a hard
+    stop in optimize_bouquets.
+    """
+
+    season_key = scenario["season_key"]
+
+    implied = estimate_bouquet_stem_count(
+        target_price=scenario["target_price"],
+        canonical_percentages=CANONICAL_RECIPES[season_key],
+        avg_wholesale_prices=avg_prices,
+    )
+
+    if implied < MIN_BB_STEMS:
+        return None
+
+    pct_bounds = get_percentage_bounds()[SEASON_KEY_TO_RECIPE_SEASON[season_key]]
+
+    tier_a = build_tier_a_allocation(
+        implied_stems_per_bouquet=implied,
+        pct_bounds_for_season=pct_bounds,
+    )
+
+    if tier_a is None:
+        return None
+
+    return {
+        "tier_a": tier_a,
+        "stem_bounds": apply_percentage_bounds(
+            total_stems=implied,
+            pct_bounds_for_season=pct_bounds,
+        ),
+    }
+
+
+def make_calls(scenario: dict, avg_prices: dict, search_mode: str) -> dict:
+    """
+    Return {benchmark name: zero-arg callable} for one scenario.
+    """
+
+    available = scenario["available_stems"]
+
+    calls = {
+        "optimize_bouquets": lambda: optimize_bouquets(
+            available_stems=available,
+            season_key=scenario["season_key"],
+            target_price=scenario["target_price"],
+            avg_wholesale_prices=avg_prices,
+            search_mode=search_mode,
+        ),
+    }
+
+    inputs = prepare_phase_inputs(scenario, avg_prices)
+
+    if inputs is None or available["Focal"] <= 0 or available["Foundation"] <= 0:
+        return calls
+
+    # Phase 3C.2 exactly as optimize_bouquets runs it for search_mode
+    def search():
+        return _search_allocation(
+            search_mode=search_mode,
+            initial_allocation=inputs["tier_a"],
+            available_stems=available,
+            stem_bounds=inputs["stem_bounds"],
+            avg_wholesale_prices=avg_prices,
+            target_price=scenario["target_price"],
+        )
+
+    search_result = search()
+
+    calls["search_allocation"] = search
+
+    calls["expand_bouquet_to_target"] = lambda: expand_bouquet_to_target(
+        base_allocation=search_result["allocation"],
+        max_bouquets=search_result["evaluation"]["max_bouquets"],
+        stem_bounds=inputs["stem_bounds"],
+        available_stems=available,
+        avg_wholesale_prices=avg_prices,
+        target_price=scenario["target_price"],
+    )
+
+    return calls
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+
+def percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(samples: list) -> dict:
+    values = sorted(samples)
+
+    return {
+        "n": len(values),
+        "mean_ms": round(sum(values) / len(values) * 1000, 4) if values else 0.0,
+        "p50_ms": round(percentile(values, 50) * 1000, 4),
+        "p90_ms": round(percentile(values, 90) * 1000, 4),
+        "p99_ms": round(percentile(values, 99) * 1000, 4),
+        "max_ms": round(values[-1] * 1000, 4) if values else 0.0,
+    }
+
+
+def time_call(func, repeats: int) -> list:
+    samples = []
+
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+
+    return samples
+
+
+def peak_memory(func) -> int:
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return peak
+
+
+def git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+    return out.stdout.strip() or None
+
+
+def run_benchmarks(quick: bool, repeats: int, search_mode: str) -> dict:
+    price_index = load_price_index()
+
+    # Warm the bounds cache so the first scenario is not penalized
+    get_percentage_bounds()
+
+    samples: dict = {}
+    peaks: dict = {}
+    scenario_results = []
+
+    for scenario in build_scenarios(quick=quick):
+        avg_prices = price_index.avg_prices(
+            SEASON_KEY_TO_PRICING_LABEL[scenario["season_key"]]
+        )
+
+        calls = make_calls(scenario, avg_prices, search_mode)
+        per_scenario = {}
+
+        for name, func in calls.items():
+            timings = time_call(func, repeats)
+            peak = peak_memory(func)
+
+            samples.setdefault(name, []).extend(timings)
+            peaks[name] = max(peaks.get(name, 0), peak)
+
+            per_scenario[name] = {
+                "p50_ms": round(percentile(sorted(timings), 50) * 1000, 4),
+                "peak_kib": round(peak / 1024, 1),
+            }
+
+        scenario_results.append({"name": scenario["name"], "timings": per_scenario})
+
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "quick": quick,
+            "repeats": repeats,
+            "search_mode": search_mode,
+        },
+        "summary": {
+            name: {**summarize(values), "peak_kib": round(peaks[name] / 1024, 1)}
+            for name, values in samples.items()
+        },
+        "scenarios": scenario_results,
+    }
+
+
+def run_sweep_check(repeats: int, search_mode: str) -> dict:
+    """
+    Time optimize_price_sweep against a loop of optimize_bouquets over
+    SWEEP_PRICES (best of `repeats` each) and check the rows match.
+    """
+
+    price_index = load_price_index()
+    season_key = SWEEP_SCENARIO["season_key"]
+    avg_prices = price_index.avg_prices(SEASON_KEY_TO_PRICING_LABEL[season_key])
+
+    available = build_inventory(
+        SWEEP_SCENARIO["scale"], SWEEP_SCENARIO["pattern"], seed=0
+    )
+
+    def sweep():
+        return optimize_price_sweep(
+            available_stems=available,
+            season_key=season_key,
+            prices=SWEEP_PRICES,
+            avg_wholesale_prices=avg_prices,
+            search_mode=search_mode,
+        )
+
+    def loop():
+        rows = []
+
+        for price in SWEEP_PRICES:
+            result = optimize_bouquets(
+                available_stems=available,
+                season_key=season_key,
+                target_price=price,
+                avg_wholesale_prices=avg_prices,
+                search_mode=search_mode,
+            )
+
+            if result is None:
+                result = {"error": "No feasible bouquet configuration at this price."}
+
+            rows.append({"target_price": price, **result})
+
+        return rows
+
+    sweep_ms = min(time_call(sweep, repeats)) * 1000
+    loop_ms = min(time_call(loop, repeats)) * 1000
+    speedup = loop_ms / sweep_ms
+
+    return {
+        "prices": len(SWEEP_PRICES),
+        "sweep_ms": round(sweep_ms, 2),
+        "loop_ms": round(loop_ms, 2),
+        "speedup": round(speedup, 2),
+        "identical": sweep() == loop(),
+        "passed": speedup >= SWEEP_MIN_SPEEDUP,
+    }
+
+
+def print_sweep_check(check: dict) -> None:
+    status = "ok" if check["passed"] and check["identical"] else "FAILED"
+
+    print(
+        f"\nprice sweep ({check['prices']} prices): sweep {check['sweep_ms']:.1f} ms, "
+        f"loop {check['loop_ms']:.1f} ms, {check['speedup']:.2f}x "
+        f"(min {SWEEP_MIN_SPEEDUP}x), identical rows: {check['identical']} – {status}"
+    )
+
+
+def print_summary(results: dict, baseline: dict | None = None) -> None:
+    header = f"{'benchmark':<26}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}{'peak KiB':>10}"
+    if baseline is not None:
+        header += f"{'p50 vs base':>13}"
+
+    print(header)
+
+    for name, s in results["summary"].items():
+        line = (
+            f"{name:<26}{s['p50_ms']:>10.3f}{s['p90_ms']:>10.3f}"
+            f"{s['p99_ms']:>10.3f}{s['max_ms']:>10.3f}{s['peak_kib']:>10.1f}"
+        )
+
+        if baseline is not None:
+            base = baseline.get("summary", {}).get(name)
+            if base and base["p50_ms"] > 0:
+                line += f"{s['p50_ms'] / base['p50_ms']:>12.2f}x"
+            else:
+                line += f"{'n/a':>13}"
+
+        print(line)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="small scenario grid")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--search-mode", choices=SEARCH_MODES, default=SEARCH_MODES[0])
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--compare", type=Path, help="baseline results JSON")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        quick=args.quick,
+        repeats=args.repeats,
+        search_mode=args.search_mode,
+    )
+
+    results["sweep_check"] = run_sweep_check(
+        repeats=args.repeats,
+        search_mode=args.search_mode,
+    )
+
+    baseline = None
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text())
+
+    print_summary(results, baseline)
+    print_sweep_check(results["sweep_check"])
+
+    if args.output is not None:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"\nWrote {args.output}")
+
+    check = results["sweep_check"]
+
+    return 0 if check["passed"] and check["identical"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Compare serial optimize_bouquets against core.scenario_runner.
+
+Runs the bench_optimizer scenario grid once in-process and once
+through the process pool for each worker count, and prints wall time
+and speedup:
+
+    python benchmarks/bench_scenario_runner.py --workers 1 2 4 8
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from bench_optimizer import build_scenarios
+from core.canonical_recipes import SEASON_KEY_TO_PRICING_LABEL
+from core.optimization import optimize_bouquets
+from core.pricing_data import load_price_index
+from core.recipe_bounds import get_percentage_bounds
+from core.scenario_runner import run_scenarios
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--quick", action="store_true", help="small scenario grid")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, 8])
+    args = parser.parse_args(argv)
+
+    price_index = load_price_index()
+    get_percentage_bounds()
+
+    jobs = [
+        (
+            scenario["available_stems"],
+            scenario["season_key"],
+            scenario["target_price"],
+            price_index.avg_prices(
+                SEASON_KEY_TO_PRICING_LABEL[scenario["season_key"]]
+            ),
+        )
+        for scenario in build_scenarios(quick=args.quick)
+    ]
+
+    start = time.perf_counter()
+    serial = [
+        optimize_bouquets(
+            available_stems=stems,
+            season_key=season_key,
+            target_price=target_price,
+            avg_wholesale_prices=prices,
+        )
+        for stems, season_key, target_price, prices in jobs
+    ]
+    serial_seconds = time.perf_counter() - start
+
+    print(f"{len(jobs)} scenarios")
+    print(f"{'workers':<10}{'seconds':>10}{'speedup':>10}")
+    print(f"{'serial':<10}{serial_seconds:>10.3f}{1.0:>10.2f}")
+
+    for workers in args.workers:
+        start = time.perf_counter()
+        pooled = run_scenarios(jobs, max_workers=workers)
+        seconds = time.perf_counter() - start
+
+        if pooled != serial:
+            print(f"{workers}: results differ from the serial run")
+            return 1
+
+        print(f"{workers:<10}{seconds:>10.3f}{serial_seconds / seconds:>10.2f}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
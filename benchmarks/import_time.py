@@ -0,0 +1,110 @@
+"""
+Measure import cost of the optimizer core and check that it does not
+pull in pandas/openpyxl.
+
+Each check runs in a fresh interpreter with `-X importtime`:
+
+    python benchmarks/import_time.py
+
+Prints the cumulative import time of every core module and the
+slowest modules it imports, and exits non-zero if any heavy module
+was loaded. The last check also loads the recipe bounds, which must
+come from their snapshot without pandas.
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+
+CORE_MODULES = [
+    "core.bouquet_sizing",
+    "core.compensation",
+    "core.bouquet_expansion",
+    "core.stem_scaling",
+    "core.optimization",
+]
+
+HEAVY_MODULES = ["pandas", "openpyxl", "numpy"]
+
+# Imports the optimizer and loads bounds the way a run does
+LOAD_BOUNDS = (
+    "import core.optimization; "
+    "from core.recipe_bounds import get_percentage_bounds; "
+    "get_percentage_bounds()"
+)
+
+
+def measure(statement: str) -> dict:
+    """
+    Run `statement` in a fresh interpreter and return its import
+    timings and which heavy modules ended up loaded.
+    """
+
+    probe = (
+        f"{statement}\n"
+        "import json, sys\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))\n"
+    )
+
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", probe],
+        cwd=ROOT_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    modules = []
+
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+
+        _, self_us, cumulative_us, name = (
+            part.strip() for part in line.replace("import time:", "|").split("|")
+        )
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    return {
+        "total_ms": sum(self_us for _, self_us, _ in modules) / 1000,
+        "slowest": sorted(modules, key=lambda m: m[1], reverse=True),
+        "heavy_loaded": json.loads(out.stdout.strip().splitlines()[-1]),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--top", type=int, default=5, help="slowest modules to list")
+    args = parser.parse_args(argv)
+
+    checks = [(f"import {module}", f"import {module}") for module in CORE_MODULES]
+    checks.append(("load bounds", LOAD_BOUNDS))
+
+    failed = False
+
+    for label, statement in checks:
+        result = measure(statement)
+
+        status = "ok"
+        if result["heavy_loaded"]:
+            status = "LOADED " + ", ".join(result["heavy_loaded"])
+            failed = True
+
+        print(f"{label:<36}{result['total_ms']:>9.1f} ms   {status}")
+
+        for name, self_us, _ in result["slowest"][:args.top]:
+            print(f"    {name:<40}{self_us / 1000:>8.1f} ms")
+
+    if failed:
+        print("\nHeavy modules are imported by the optimizer core.")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,159 @@
+"""
+Batched allocation evaluation.
+
+evaluate_allocation works on one allocation dict at a time. The
+functions here take a whole batch of allocation vectors (an N × C
+integer matrix, columns in AllocationSpace order) and compute bouquet
+counts, limiting categories and stranded stems for all rows at once
+with NumPy.
+
+NumPy is imported on first use. Small batches are cheaper in plain
+Python than the array round trip, so max_bouquets_batch only switches
+to NumPy above NUMPY_MIN_BATCH rows.
+"""
+
+from typing import Dict, List, Sequence
+
+from core.compensation import max_bouquets_for_vector
+
+# Below this many rows, per-row Python evaluation is faster
+NUMPY_MIN_BATCH = 256
+
+
+def _numpy():
+    import numpy
+
+    return numpy
+
+
+def evaluate_batch(matrix, available) -> Dict:
+    """
+    Evaluate N per-bouquet allocations against one availability vector.
+
+    Args:
+        matrix: N × C integer matrix (array or sequence of vectors)
+        available: length-C vector of available stems
+
+    Returns:
+        {
+            "max_bouquets": int array (N,),
+            "limiting_index": int array (N,), -1 where no category
+                              uses any stems,
+            "stranded_stems": int array (N, C),
+        }
+
+    Row results match _evaluate_vector / evaluate_allocation: the
+    limiting category is the first one with the smallest
+    available / per_bouquet ratio, and rows without any stems make
+    0 bouquets and strand everything.
+    """
+
+    np = _numpy()
+
+    matrix = np.asarray(matrix, dtype=np.int64)
+    available = np.asarray(available, dtype=np.int64)
+
+    if matrix.ndim != 2 or matrix.shape[1] != available.shape[0]:
+        raise ValueError(
+            f"Expected an N x {available.shape[0]} matrix, got shape {matrix.shape}"
+        )
+
+    used = matrix > 0
+
+    with np.errstate(divide="ignore"):
+        ratios = np.where(used, available / np.where(used, matrix, 1), np.inf)
+
+    any_used = used.any(axis=1)
+
+    limiting_index = np.where(any_used, ratios.argmin(axis=1), -1)
+
+    max_bouquets = np.zeros(matrix.shape[0], dtype=np.int64)
+    if any_used.any():
+        max_bouquets[any_used] = ratios[any_used].min(axis=1).astype(np.int64)
+
+    stranded_stems = available - matrix * max_bouquets[:, None]
+
+    return {
+        "max_bouquets": max_bouquets,
+        "limiting_index": limiting_index,
+        "stranded_stems": stranded_stems,
+    }
+
+
+def max_bouquets_batch(
+    vectors: Sequence[tuple],
+    available: tuple,
+    context=None,
+) -> List[int]:
+    """
+    Bouquet count for each vector in `vectors`, as a list of ints.
+
+    Same result as calling max_bouquets_for_vector per vector; large
+    batches go through one NumPy pass instead. Small batches use the
+    tables of `context` (an AllocationContext for `available`) if given.
+    """
+
+    if len(vectors) < NUMPY_MIN_BATCH:
+        if context is not None:
+            return list(map(context.max_bouquets, vectors))
+
+        return [max_bouquets_for_vector(v, available) for v in vectors]
+
+    np = _numpy()
+
+    matrix = np.asarray(vectors, dtype=np.int64)
+    available = np.asarray(available, dtype=np.int64)
+
+    used = matrix > 0
+
+    counts = np.where(
+        used,
+        available // np.where(used, matrix, 1),
+        np.iinfo(np.int64).max,
+    ).min(axis=1)
+
+    # Rows without any stems make no bouquets
+    counts[~used.any(axis=1)] = 0
+
+    return counts.tolist()
+
+
+def evaluate_allocations(
+    allocations: Sequence[Dict[str, int]],
+    available_stems: Dict[str, int],
+) -> List[Dict]:
+    """
+    evaluate_allocation for a list of allocation dicts sharing the same
+    categories. Returns one {max_bouquets, limiting_category,
+    stranded_stems} dict per allocation, in input order.
+    """
+
+    if not allocations:
+        return []
+
+    categories = list(allocations[0])
+    matrix = [[a.get(c, 0) for c in categories] for a in allocations]
+    available = [available_stems.get(c, 0) for c in categories]
+
+    batch = evaluate_batch(matrix, available)
+
+    results = []
+
+    for row, limiting in enumerate(batch["limiting_index"].tolist()):
+        if limiting < 0:
+            results.append({
+                "max_bouquets": 0,
+                "limiting_category": None,
+                "stranded_stems": {},
+            })
+            continue
+
+        stranded = batch["stranded_stems"][row].tolist()
+
+        results.append({
+            "max_bouquets": int(batch["max_bouquets"][row]),
+            "limiting_category": categories[limiting],
+            "stranded_stems": dict(zip(categories, stranded)),
+        })
+
+    return results
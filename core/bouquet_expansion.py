@@ -1,3 +1,8 @@
+import heapq
+from math import floor
+
+from core.instrumentation import traced
+
 CATEGORY_EXPANSION_WEIGHT = {
     "Foundation": 1.4,
     "Filler": 1.3,
@@ -7,6 +12,14 @@ CATEGORY_EXPANSION_WEIGHT = {
     "Focal": 0.4,   # 👈 intentionally low
 }
 
+# "dp": bounded knapsack over integer cents, closest to target price
+# "greedy": one stem at a time by score_addition
+EXPANSION_METHODS = ("dp", "greedy")
+
+# Largest DP table (items x price steps); beyond it prices are counted
+# in coarser steps than a cent
+DP_MAX_CELLS = 1 << 22
+
 def bouquet_cost(
     allocation: dict[str, int],
     avg_wholesale_prices: dict[str, float],
@@ -16,6 +29,33 @@ def bouquet_cost(
         for c in allocation
     )
 
+def max_stems_per_bouquet(
+    category: str,
+    stem_bounds: dict[str, dict[str, float]],
+    available_stems: dict[str, int],
+    max_bouquets: int,
+    min_bouquets: int = 1,
+) -> int:
+    """
+    Largest per-bouquet stem count a category may be expanded to.
+
+    A stem is legal if it stays within absolute_max and the inventory
+    can support it across at least `min_bouquets` bouquets (the bouquet
+    count may relax down to that), so the inventory limit is simply
+    available // min_bouquets.
+    """
+
+    limit = floor(stem_bounds[category]["absolute_max"])
+
+    if max_bouquets < min_bouquets:
+        # No bouquet count to relax to: nothing can be added
+        return -1
+
+    if min_bouquets <= 0:
+        return limit
+
+    return min(limit, available_stems.get(category, 0) // min_bouquets)
+
 def can_add_stem(
     allocation: dict[str, int],
     category: str,
@@ -30,19 +70,14 @@ def can_add_stem(
     """
 
     current = allocation.get(category, 0)
-    bounds = stem_bounds[category]
-
-    # Must not exceed absolute max
-    if current + 1 > bounds["absolute_max"]:
-        return False
 
-    # Try supporting the stem across fewer bouquets if needed
-    for bouquets in range(max_bouquets, min_bouquets - 1, -1):
-        required_total = (current + 1) * bouquets
-        if available_stems.get(category, 0) >= required_total:
-            return True
-
-    return False
+    return current + 1 <= max_stems_per_bouquet(
+        category,
+        stem_bounds,
+        available_stems,
+        max_bouquets,
+        min_bouquets,
+    )
 
 def score_addition(
     allocation,
@@ -72,6 +107,7 @@ def score_addition(
 
     return base_score * weight
 
+@traced("expand_bouquet_to_target")
 def expand_bouquet_to_target(
     base_allocation: dict[str, int],
     max_bouquets: int,
@@ -79,25 +115,314 @@ def expand_bouquet_to_target(
     available_stems: dict[str, int],
     avg_wholesale_prices: dict[str, float],
     target_price: float,
+    method: str = "dp",
+    stats=None,
+    context=None,
 ) -> dict[str, int]:
     """
     Expand a bouquet by adding stems until target price is met
     or no further legal additions are possible.
+
+    `method` is one of EXPANSION_METHODS. `context` is the run's
+    AllocationContext (core.compensation), used for the stem limits.
+    """
+
+    limits = expansion_limits(
+        base_allocation,
+        max_bouquets,
+        stem_bounds,
+        available_stems,
+        min_bouquets=_min_bouquets_for(method, max_bouquets),
+        context=context,
+    )
+
+    return _expand(
+        method=method,
+        base_allocation=base_allocation,
+        limits=limits,
+        stem_bounds=stem_bounds,
+        available_stems=available_stems,
+        avg_wholesale_prices=avg_wholesale_prices,
+        target_price=target_price,
+        stats=stats,
+    )
+
+def expansion_limits(
+    allocation: dict[str, int],
+    max_bouquets: int,
+    stem_bounds: dict[str, dict[str, float]],
+    available_stems: dict[str, int],
+    min_bouquets: int = 1,
+    context=None,
+) -> dict[str, int]:
+    """
+    max_stems_per_bouquet for every category of `allocation`, from the
+    run's AllocationContext when one is given.
+    """
+
+    if context is not None and context.covers(allocation):
+        return context.expansion_limits(allocation, max_bouquets, min_bouquets)
+
+    return {
+        category: max_stems_per_bouquet(
+            category,
+            stem_bounds,
+            available_stems,
+            max_bouquets,
+            min_bouquets,
+        )
+        for category in allocation
+    }
+
+def _min_bouquets_for(method: str, bouquet_count: int) -> int:
+    """
+    Bouquets an expansion must keep possible.
+
+    The greedy expansion may trade bouquets for stems (its score
+    favours abundant categories instead). The DP only optimizes price,
+    so it is held to `bouquet_count`; fewer bouquets are explored by
+    the callers' count tables.
+    """
+
+    return bouquet_count if method == "dp" else 1
+
+@traced("expand_bouquet_for_counts")
+def expand_bouquet_for_counts(
+    base_allocation: dict[str, int],
+    bouquet_counts,
+    stem_bounds: dict[str, dict[str, float]],
+    available_stems: dict[str, int],
+    avg_wholesale_prices: dict[str, float],
+    target_price: float,
+    method: str = "dp",
+    stats=None,
+    context=None,
+) -> list[dict]:
+    """
+    expand_bouquet_to_target for many bouquet counts in one sweep.
+
+    The expansion only depends on the bouquet count through the
+    per-category expansion limits, and those can only loosen as the
+    count goes down. Counts that share the limits of an earlier count
+    reuse its expansion, so a whole sweep costs one expansion per
+    distinct set of limits (a single one when every count can relax
+    down to one bouquet).
+
+    Returns one row per count, in the order given:
+        {
+            "bouquet_count": int,
+            "allocation": dict[str, int],
+            "bouquet_cost": float,
+            "price_delta": float,
+        }
+    Rows that reuse an expansion share its allocation dict, which must
+    not be mutated.
+    """
+
+    return list(
+        iter_expansions_for_counts(
+            base_allocation=base_allocation,
+            bouquet_counts=bouquet_counts,
+            stem_bounds=stem_bounds,
+            available_stems=available_stems,
+            avg_wholesale_prices=avg_wholesale_prices,
+            target_price=target_price,
+            method=method,
+            stats=stats,
+            context=context,
+        )
+    )
+
+def iter_expansions_for_counts(
+    base_allocation: dict[str, int],
+    bouquet_counts,
+    stem_bounds: dict[str, dict[str, float]],
+    available_stems: dict[str, int],
+    avg_wholesale_prices: dict[str, float],
+    target_price: float,
+    method: str = "dp",
+    stats=None,
+    context=None,
+):
+    """
+    Lazy expand_bouquet_for_counts: rows are expanded as they are
+    consumed, so a caller that stops early skips the remaining counts.
+    """
+
+    expansions: dict = {}
+
+    for bouquet_count in bouquet_counts:
+        limits = expansion_limits(
+            base_allocation,
+            bouquet_count,
+            stem_bounds,
+            available_stems,
+            min_bouquets=_min_bouquets_for(method, bouquet_count),
+            context=context,
+        )
+        key = tuple(limits.values())
+
+        if key not in expansions:
+            allocation = _expand(
+                method=method,
+                base_allocation=base_allocation,
+                limits=limits,
+                stem_bounds=stem_bounds,
+                available_stems=available_stems,
+                avg_wholesale_prices=avg_wholesale_prices,
+                target_price=target_price,
+                stats=stats,
+            )
+            cost = bouquet_cost(allocation, avg_wholesale_prices)
+            expansions[key] = (allocation, cost)
+
+        allocation, cost = expansions[key]
+
+        yield {
+            "bouquet_count": bouquet_count,
+            "allocation": allocation,
+            "bouquet_cost": cost,
+            "price_delta": cost - target_price,
+        }
+
+def bisect_dp_expansion_counts(
+    base_allocation: dict[str, int],
+    max_count: int,
+    stem_bounds: dict[str, dict[str, float]],
+    available_stems: dict[str, int],
+    avg_wholesale_prices: dict[str, float],
+    target_price: float,
+    tolerance: float,
+    stats=None,
+    context=None,
+):
     """
+    The DP row with the most bouquets among counts 1..max_count whose
+    |price_delta| is within `tolerance`; if none is, the one with the
+    most bouquets that is as close as count 1. None if max_count < 1.
 
+    A DP row is the closest price its limits allow, and the limits only
+    loosen as the count drops, so |price_delta| never grows as the
+    count goes down: bisecting expands O(log max_count) counts instead
+    of every one.
+    """
+
+    if max_count < 1:
+        return None
+
+    def row_for(count: int) -> dict:
+        if stats is not None:
+            stats.add("price_rescue_trials")
+
+        return next(
+            iter_expansions_for_counts(
+                base_allocation=base_allocation,
+                bouquet_counts=[count],
+                stem_bounds=stem_bounds,
+                available_stems=available_stems,
+                avg_wholesale_prices=avg_wholesale_prices,
+                target_price=target_price,
+                method="dp",
+                stats=stats,
+                context=context,
+            )
+        )
+
+    best = row_for(1)
+
+    # Distances come from whole cents: half a cent separates them
+    bound = max(tolerance, abs(best["price_delta"]) + 0.005)
+
+    low, high = 1, max_count
+
+    while low < high:
+        mid = (low + high + 1) // 2
+        row = row_for(mid)
+
+        if abs(row["price_delta"]) <= bound:
+            best = row
+            low = mid
+        else:
+            high = mid - 1
+
+    return best
+
+def _expand(method: str, **kwargs) -> dict[str, int]:
+    if method == "dp":
+        return _expand_to_price_dp(**kwargs)
+
+    if method == "greedy":
+        return _expand_within_limits(**kwargs)
+
+    raise ValueError(
+        f"Unknown expansion method '{method}'. "
+        f"Expected one of: {', '.join(EXPANSION_METHODS)}"
+    )
+
+def _expand_within_limits(
+    base_allocation: dict[str, int],
+    limits: dict[str, int],
+    stem_bounds: dict[str, dict[str, float]],
+    available_stems: dict[str, int],
+    avg_wholesale_prices: dict[str, float],
+    target_price: float,
+    stats=None,
+) -> dict[str, int]:
     allocation = base_allocation.copy()
 
     PRICE_TOLERANCE = 1.0
     MAX_EXPANSION_STEPS = 25
 
+    categories = list(allocation)
+
+    # Per-category constants, resolved once
+    design_mid = {}
+    availability = {}
+    weight = {}
+
+    for category in categories:
+        bounds = stem_bounds[category]
+
+        design_mid[category] = (bounds["design_min"] + bounds["design_max"]) / 2
+        availability[category] = available_stems.get(category, 0)
+        weight[category] = CATEGORY_EXPANSION_WEIGHT.get(category, 1.0)
+
+    def score(category: str, price_pressure: float) -> float:
+        # Same formula as score_addition
+        distance_penalty = abs((allocation[category] + 1) - design_mid[category])
+        price_penalty = avg_wholesale_prices[category] * price_pressure
+
+        base_score = (
+            availability[category] - distance_penalty * 10 - price_penalty
+        )
+
+        return base_score * weight[category]
+
+    # Ties on score go to the larger category name, as with
+    # max((score, category)); rank 0 is the largest name
+    rank = {c: i for i, c in enumerate(sorted(categories, reverse=True))}
+
+    # While there is no price pressure, a category's score only depends
+    # on its own stem count, so a heap holding one entry per addable
+    # category stays valid if only the chosen category is re-pushed.
+    heap = []
+
+    def push(category: str) -> None:
+        if allocation[category] + 1 <= limits[category]:
+            heapq.heappush(heap, (-score(category, 0), rank[category], category))
+
+    for category in categories:
+        push(category)
+
+    current_cost = bouquet_cost(allocation, avg_wholesale_prices)
+
     best_allocation = allocation.copy()
-    best_delta = abs(bouquet_cost(allocation, avg_wholesale_prices) - target_price)
+    best_delta = abs(current_cost - target_price)
 
     steps = 0
 
     # ---- expansion loop (price-driven, closest-wins) ----
     while steps < MAX_EXPANSION_STEPS:
-        current_cost = bouquet_cost(allocation, avg_wholesale_prices)
         current_delta = abs(current_cost - target_price)
 
         # If this step is worse than the best we've seen, stop
@@ -109,36 +434,150 @@ def expand_bouquet_to_target(
             best_delta = current_delta
             best_allocation = allocation.copy()
 
-        candidates = []
-
-        for category in allocation:
-            if can_add_stem(
-                allocation,
-                category,
-                stem_bounds,
-                available_stems,
-                max_bouquets,
-            ):
-                score = score_addition(
-                    allocation,
-                    category,
-                    stem_bounds,
-                    available_stems,
-                    avg_wholesale_prices,
-                    target_price,
-                    current_cost,
-                )
-
-                candidates.append((score, category))
-
-        if not candidates:
-            break
+        # Penalize expensive stems as we approach target price
+        price_pressure = max(0, current_cost - 0.9 * target_price)
+
+        if price_pressure > 0:
+            # Every score moves with the pressure: rescore all candidates
+            candidates = [
+                (score(category, price_pressure), category)
+                for category in categories
+                if allocation[category] + 1 <= limits[category]
+            ]
+
+            if not candidates:
+                break
+
+            _, chosen = max(candidates)
+        else:
+            if not heap:
+                break
+
+            _, _, chosen = heapq.heappop(heap)
 
-        _, chosen = max(candidates)
         allocation[chosen] += 1
+        current_cost += avg_wholesale_prices[chosen]
 
         steps += 1
 
+        if price_pressure <= 0:
+            push(chosen)
+
+    if stats is not None:
+        stats.add("expansion_steps", steps)
+
     return best_allocation
-    
 
+def _price_cents(price: float) -> int:
+    return int(round(price * 100))
+
+def _expand_to_price_dp(
+    base_allocation: dict[str, int],
+    limits: dict[str, int],
+    stem_bounds: dict[str, dict[str, float]],
+    available_stems: dict[str, int],
+    avg_wholesale_prices: dict[str, float],
+    target_price: float,
+    stats=None,
+) -> dict[str, int]:
+    """
+    Phase 3D as a bounded knapsack over integer cents.
+
+    Chooses how many stems to add per category (up to its expansion
+    limit) so the bouquet cost lands as close to `target_price` as
+    possible. Among equally close costs, the additions with the largest
+    sum of CATEGORY_EXPANSION_WEIGHT win, then the cheaper one.
+
+    Stem counts are split into power-of-two items (binary splitting),
+    so each category contributes O(log count) 0/1 items and the table
+    costs O(items x target cents). Sums past twice the remaining budget
+    are never closer than adding nothing, which bounds the table. Above
+    DP_MAX_CELLS cells, prices are rounded to a coarser step so the
+    table stays within it.
+    """
+
+    import numpy as np
+
+    allocation = base_allocation.copy()
+
+    remaining = _price_cents(target_price) - sum(
+        _price_cents(avg_wholesale_prices[c]) * stems
+        for c, stems in allocation.items()
+    )
+
+    if remaining <= 0:
+        return allocation
+
+    span = 2 * remaining
+
+    # (category, stems, cost in cents, tie-break weight)
+    items = []
+
+    for category, stems in allocation.items():
+        room = limits[category] - stems
+        cost = _price_cents(avg_wholesale_prices[category])
+
+        if room <= 0 or cost > span:
+            continue
+
+        if cost > 0:
+            room = min(room, span // cost)
+
+        weight = CATEGORY_EXPANSION_WEIGHT.get(category, 1.0)
+
+        chunk = 1
+        while room > 0:
+            take = min(chunk, room)
+            items.append((category, take, take * cost, take * weight))
+            room -= take
+            chunk *= 2
+
+    # Coarser price steps for very large budgets: the budget and every
+    # cost are rounded to `step` cents (a paid stem still costs >= 1)
+    step = -(-len(items) * (span + 1) // DP_MAX_CELLS)
+
+    if step > 1:
+        remaining = round(remaining / step)
+        span = 2 * remaining
+        items = [
+            (category, stems, max(1, round(cost / step)) if cost else 0, weight)
+            for category, stems, cost, weight in items
+        ]
+        items = [item for item in items if item[2] <= span]
+
+    # best[a]: largest tie-break weight of additions costing exactly a
+    best = np.full(span + 1, -np.inf)
+    best[0] = 0.0
+
+    taken = []
+
+    for _, _, cost, weight in items:
+        candidate = np.full(span + 1, -np.inf)
+        candidate[cost:] = best[:span + 1 - cost] + weight
+
+        take = candidate > best
+        best = np.where(take, candidate, best)
+        taken.append(take)
+
+    reachable = np.flatnonzero(np.isfinite(best))
+
+    # Closest to the remaining budget, then heaviest, then cheapest
+    order = np.lexsort((
+        reachable,
+        -best[reachable],
+        np.abs(reachable - remaining),
+    ))
+    spent = int(reachable[order[0]])
+
+    for (category, stems, cost, _), take in zip(reversed(items), reversed(taken)):
+        if take[spent]:
+            allocation[category] += stems
+            spent -= cost
+
+    if stats is not None:
+        stats.add("expansion_dp_cells", len(items) * (span + 1))
+
+        if step > 1:
+            stats.add("expansion_dp_coarsened")
+
+    return allocation
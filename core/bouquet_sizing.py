@@ -2,11 +2,15 @@
 
 from typing import Dict
 
+from core.instrumentation import traced
 
+
+@traced("estimate_bouquet_stem_count")
 def estimate_bouquet_stem_count(
     target_price: float,
     canonical_percentages: Dict[str, float],
     avg_wholesale_prices: Dict[str, float],
+    stats=None,
 ) -> float:
     """
     Estimate bouquet stem count using canonical recipe proportions only.
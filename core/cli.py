@@ -0,0 +1,343 @@
+"""
+Headless command line entry point for the optimizer.
+
+    python -m core.cli optimize inventories.csv > results.jsonl
+    python -m core.cli optimize inventories.jsonl --format csv > results.csv
+    cat inventories.jsonl | python -m core.cli optimize - --input-format jsonl
+
+Each input row is one scenario:
+
+- CSV: columns `season_key`, `target_price` and one column per stem
+  category (Focal, Foundation, ...) holding available stems; an
+  optional `id` column is echoed back.
+- JSONL: objects with `season_key`, `target_price` and
+  `available_stems` ({category: stems}), plus optional `id` and
+  `avg_wholesale_prices` ({category: price}).
+
+Rows without prices use the season's averages from the Master Variety
+List. Bounds and prices are loaded once (from their snapshots) for the
+whole run. Results are written to stdout one row at a time; a summary
+with throughput goes to stderr.
+
+Does not need Streamlit.
+"""
+
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+from typing import Dict, Iterator, Optional, TextIO
+
+from core.canonical_recipes import SEASON_KEY_TO_PRICING_LABEL
+from core.optimization import SEARCH_MODES, optimize_bouquets
+from core.pricing_data import load_price_index
+from core.recipe_bounds import VALID_CATEGORIES, get_percentage_bounds
+
+INPUT_FORMATS = ("csv", "jsonl")
+OUTPUT_FORMATS = ("jsonl", "csv")
+
+RESULT_FIELDS = [
+    "max_bouquets",
+    "total_stems",
+    "bouquet_cost",
+    "price_delta",
+    "within_price_tolerance",
+    "waste_penalty",
+]
+
+
+# -----------------------------
+# Input
+# -----------------------------
+
+def detect_input_format(path: str) -> str:
+    if path.endswith(".csv"):
+        return "csv"
+
+    if path.endswith((".jsonl", ".ndjson", ".json")):
+        return "jsonl"
+
+    raise ValueError(
+        f"Cannot tell the format of '{path}'. Use --input-format."
+    )
+
+
+def read_scenarios(stream: TextIO, input_format: str) -> Iterator[Dict]:
+    """
+    Yield one scenario dict per input row:
+    {id, season_key, target_price, available_stems, avg_wholesale_prices}.
+
+    Rows that cannot be parsed yield {"id", "error"} instead.
+    """
+
+    if input_format == "csv":
+        rows = csv.DictReader(stream)
+    else:
+        rows = (line for line in stream if line.strip())
+
+    for line_number, row in enumerate(rows, start=1):
+        row_id = line_number
+
+        try:
+            if input_format == "jsonl":
+                row = json.loads(row)
+
+            row_id = row.get("id") or line_number
+
+            yield _parse_row(row, row_id, input_format)
+        except (KeyError, ValueError, TypeError, AttributeError) as e:
+            yield {"id": row_id, "error": f"Invalid row: {e}"}
+
+
+def _parse_row(row: Dict, row_id, input_format: str) -> Dict:
+    season_key = row["season_key"]
+
+    if season_key not in SEASON_KEY_TO_PRICING_LABEL:
+        raise ValueError(f"unknown season_key '{season_key}'")
+
+    if input_format == "csv":
+        available_stems = {
+            category: _stem_count(category, row.get(category) or 0)
+            for category in VALID_CATEGORIES
+        }
+        prices = None
+    else:
+        available_stems = {
+            category: _stem_count(
+                category, row["available_stems"].get(category, 0)
+            )
+            for category in VALID_CATEGORIES
+        }
+        prices = row.get("avg_wholesale_prices")
+
+    target_price = float(row["target_price"])
+
+    if not math.isfinite(target_price) or target_price <= 0:
+        raise ValueError(
+            f"target_price must be a positive number, got {target_price}"
+        )
+
+    return {
+        "id": row_id,
+        "season_key": season_key,
+        "target_price": target_price,
+        "available_stems": available_stems,
+        "avg_wholesale_prices": prices,
+    }
+
+
+def _stem_count(category: str, value) -> int:
+    """
+    A whole, non-negative stem count from a CSV cell or JSON value.
+    """
+
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+
+    try:
+        if isinstance(value, bool) or not isinstance(value, (int, str)):
+            raise ValueError
+        stems = int(value)
+    except ValueError:
+        raise ValueError(
+            f"{category} stems must be a whole number, got {value!r}"
+        ) from None
+
+    if stems < 0:
+        raise ValueError(f"{category} stems cannot be negative, got {stems}")
+
+    return stems
+
+
+# -----------------------------
+# Output
+# -----------------------------
+
+class JsonlWriter:
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+
+    def write(self, record: Dict) -> None:
+        self.stream.write(json.dumps(record) + "\n")
+        self.stream.flush()
+
+
+class CsvWriter:
+    """
+    One flat row per scenario: inputs, result fields, then the recipe
+    and stranded stems per category.
+    """
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.fieldnames = (
+            ["id", "season_key", "target_price"]
+            + RESULT_FIELDS
+            + [f"recipe_{c}" for c in VALID_CATEGORIES]
+            + [f"stranded_{c}" for c in VALID_CATEGORIES]
+            + ["error"]
+        )
+        self.writer = csv.DictWriter(
+            stream,
+            fieldnames=self.fieldnames,
+            extrasaction="ignore",
+        )
+        self.writer.writeheader()
+
+    def write(self, record: Dict) -> None:
+        row = dict(record)
+
+        for category, stems in (record.get("recipe") or {}).items():
+            row[f"recipe_{category}"] = stems
+
+        for category, stems in (record.get("stranded_stems") or {}).items():
+            row[f"stranded_{category}"] = stems
+
+        self.writer.writerow(row)
+        self.stream.flush()
+
+
+# -----------------------------
+# optimize command
+# -----------------------------
+
+def optimize_scenarios(
+    scenarios: Iterator[Dict],
+    search_mode: str = "best_first",
+) -> Iterator[Dict]:
+    """
+    Run optimize_bouquets for each scenario and yield output records
+    ({id, season_key, target_price} plus the result fields, or an
+    "error"). Rows the optimizer rejects get an "error" too.
+    """
+
+    price_index = load_price_index()
+    get_percentage_bounds()
+
+    season_prices: Dict[str, Dict[str, float]] = {}
+
+    for scenario in scenarios:
+        if "error" in scenario:
+            yield scenario
+            continue
+
+        season_key = scenario["season_key"]
+        prices = scenario["avg_wholesale_prices"]
+
+        if prices is None:
+            if season_key not in season_prices:
+                season_prices[season_key] = price_index.avg_prices(
+                    SEASON_KEY_TO_PRICING_LABEL[season_key]
+                )
+            prices = season_prices[season_key]
+
+        record = {
+            "id": scenario["id"],
+            "season_key": season_key,
+            "target_price": scenario["target_price"],
+        }
+
+        # A row the optimizer fails on (e.g. prices missing a
+        # category) is reported on its own record; the rest of the
+        # batch still runs
+        try:
+            result = optimize_bouquets(
+                available_stems=scenario["available_stems"],
+                season_key=season_key,
+                target_price=scenario["target_price"],
+                avg_wholesale_prices=prices,
+                search_mode=search_mode,
+            )
+        except Exception as e:
+            result = {
+                "error": f"Optimization failed: {type(e).__name__}: {e}"
+            }
+
+        if result is None:
+            result = {"error": "No feasible bouquet configuration at this price."}
+
+        record.update(result)
+
+        yield record
+
+
+def run_optimize(args, stdout: TextIO, stderr: TextIO) -> int:
+    input_format = args.input_format
+    if input_format is None:
+        input_format = detect_input_format(args.input)
+
+    if args.input == "-":
+        stream = sys.stdin
+    else:
+        stream = open(args.input, newline="", encoding="utf-8")
+
+    writer = JsonlWriter(stdout) if args.format == "jsonl" else CsvWriter(stdout)
+
+    count = 0
+    errors = 0
+    start = time.perf_counter()
+
+    try:
+        for record in optimize_scenarios(
+            read_scenarios(stream, input_format),
+            search_mode=args.search_mode,
+        ):
+            writer.write(record)
+
+            count += 1
+            if "error" in record:
+                errors += 1
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    seconds = time.perf_counter() - start
+    rate = count / seconds if seconds > 0 else 0.0
+
+    print(
+        f"Optimized {count} scenarios ({errors} with errors) "
+        f"in {seconds:.2f}s, {rate:.1f} scenarios/s",
+        file=stderr,
+    )
+
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m core.cli",
+        description="Bouquet Blueprint optimizer command line.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    optimize = subparsers.add_parser(
+        "optimize",
+        help="run the optimizer over a CSV/JSONL file of inventories",
+    )
+    optimize.add_argument("input", help="input file, or - for stdin")
+    optimize.add_argument("--input-format", choices=INPUT_FORMATS)
+    optimize.add_argument("--format", choices=OUTPUT_FORMATS, default="jsonl")
+    optimize.add_argument(
+        "--search-mode",
+        choices=SEARCH_MODES,
+        default=SEARCH_MODES[0],
+    )
+    optimize.set_defaults(func=run_optimize)
+
+    return parser
+
+
+def main(argv=None, stdout: Optional[TextIO] = None, stderr: Optional[TextIO] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        return args.func(args, stdout or sys.stdout, stderr or sys.stderr)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,24 @@
-from math import ceil
-from typing import Dict
+import sys
+from bisect import bisect_right
+from collections import defaultdict
+from math import ceil, floor, inf
+from operator import getitem
+from typing import Dict, Optional
+
+from core.instrumentation import traced
+from core.recipe_bounds import VALID_CATEGORIES
 
 MAX_COMPENSATION_DEPTH = 6
 
+# search_best_first: most moves from the initial allocation, and most
+# nodes expanded before the best allocation so far is returned
+BEST_FIRST_MAX_DEPTH = 12
+SEARCH_NODE_BUDGET = 250
+
+# Largest search state space tracked in a bytearray (one byte per
+# state); bigger spaces use a dict keyed by the visited states only
+VISITED_TABLE_MAX_STATES = 1 << 16
+
 def initialize_allocation(
     stem_bounds: Dict[str, Dict[str, float]],
     available_stems: Dict[str, int],
@@ -54,37 +70,673 @@ def evaluate_allocation(
     - stranded stems
     """
 
-    bouquet_limits = {}
+    categories = list(allocation)
+    vector = tuple(allocation[c] for c in categories)
+    available = tuple(available_stems.get(c, 0) for c in categories)
 
-    for category, per_bouquet in allocation.items():
-        if per_bouquet <= 0:
-            continue
+    max_bouquets, limiting_index = _evaluate_vector(vector, available)
 
-        available = available_stems.get(category, 0)
-        bouquet_limits[category] = available / per_bouquet
-
-    if not bouquet_limits:
+    if limiting_index is None:
         return {
             "max_bouquets": 0,
             "limiting_category": None,
             "stranded_stems": {},
         }
 
-    limiting_category = min(bouquet_limits, key=bouquet_limits.get)
-    max_bouquets = int(bouquet_limits[limiting_category])
-
-    stranded_stems = {
-        category: available_stems.get(category, 0)
-        - allocation.get(category, 0) * max_bouquets
-        for category in allocation
-    }
-
     return {
         "max_bouquets": max_bouquets,
-        "limiting_category": limiting_category,
-        "stranded_stems": stranded_stems,
+        "limiting_category": categories[limiting_index],
+        "stranded_stems": {
+            category: available[i] - vector[i] * max_bouquets
+            for i, category in enumerate(categories)
+        },
     }
 
+# -----------------------------
+# Integer-vector representation
+# -----------------------------
+#
+# The search works on allocations stored as int tuples in a fixed
+# category order (VALID_CATEGORIES first, then anything else in the
+# order it was given). Bounds, availability and compensators are
+# resolved once per search into vectors of the same order.
+
+def category_order(categories) -> tuple:
+    """
+    Return `categories` in canonical order.
+    """
+
+    categories = list(categories)
+    known = [c for c in VALID_CATEGORIES if c in categories]
+    extra = [c for c in categories if c not in VALID_CATEGORIES]
+
+    return tuple(known + extra)
+
+
+# Table entry for a category that uses no stems: it never limits
+_UNLIMITED = sys.maxsize
+
+
+class AllocationContext:
+    """
+    Per-run evaluation tables.
+
+    Within one optimize_bouquets run the availability and stem bounds
+    are fixed, so for each category i and each legal per-bouquet count
+    k (0 up to absolute_max) the context precomputes:
+
+    - quotients[i][k]: available[i] // k, the bouquets category i allows
+    - floor_quotients[i][k]: quotients[i][min(k, lower[i])], the most
+      bouquets any reduction of k allows (see bouquet_upper_bound)
+
+    Bouquet counts are then one table lookup per category and a min.
+    Counts outside the tables (above absolute_max) fall back to
+    division. The context also holds the vectors AllocationSpace is
+    built from:
+
+    - categories: category names, in vector order
+    - available: stems available per category
+    - lower: smallest legal per-bouquet count (effective lower bound)
+    - upper: largest legal per-bouquet count (absolute max)
+    """
+
+    __slots__ = (
+        "categories",
+        "index",
+        "available",
+        "lower",
+        "upper",
+        "quotients",
+        "floor_quotients",
+    )
+
+    def __init__(
+        self,
+        categories,
+        available_stems: dict[str, int],
+        stem_bounds: dict[str, dict[str, float]],
+    ):
+        self.categories = category_order(categories)
+        self.index = {c: i for i, c in enumerate(self.categories)}
+
+        self.available = tuple(
+            available_stems.get(c, 0) for c in self.categories
+        )
+
+        # Reducing x is legal while x - 1 >= bound, i.e. x - 1 >= ceil(bound)
+        self.lower = tuple(
+            ceil(get_effective_lower_bound(c, stem_bounds, available_stems))
+            for c in self.categories
+        )
+
+        # Increasing x is legal while x + 1 <= absolute_max
+        self.upper = tuple(
+            floor(stem_bounds[c]["absolute_max"])
+            if c in stem_bounds and "absolute_max" in stem_bounds[c]
+            else inf
+            for c in self.categories
+        )
+
+        self.quotients = []
+        self.floor_quotients = []
+
+        for available, lower, upper in zip(self.available, self.lower, self.upper):
+            top = max(lower, upper if upper != inf else lower)
+
+            quotients = [_UNLIMITED] + [available // k for k in range(1, top + 1)]
+
+            self.quotients.append(quotients)
+            self.floor_quotients.append(
+                [quotients[min(k, lower)] for k in range(top + 1)]
+            )
+
+    def matches(self, categories) -> bool:
+        return self.categories == category_order(categories)
+
+    def to_vector(self, allocation: dict[str, int]) -> tuple:
+        return tuple(allocation.get(c, 0) for c in self.categories)
+
+    def max_bouquets(self, vector: tuple) -> int:
+        """
+        max_bouquets_for_vector by table lookup (counts must not be
+        negative).
+        """
+
+        try:
+            count = min(map(getitem, self.quotients, vector))
+        except IndexError:
+            return max_bouquets_for_vector(vector, self.available)
+
+        return 0 if count == _UNLIMITED else count
+
+    def upper_bound(self, vector: tuple) -> int:
+        """
+        bouquet_upper_bound by table lookup.
+        """
+
+        try:
+            count = min(map(getitem, self.floor_quotients, vector))
+        except IndexError:
+            floors = tuple(min(x, lower) for x, lower in zip(vector, self.lower))
+            return max_bouquets_for_vector(floors, self.available)
+
+        return 0 if count == _UNLIMITED else count
+
+    def covers(self, allocation: dict[str, int]) -> bool:
+        """
+        True if every category of `allocation` is in this context.
+        """
+
+        return self.index.keys() >= allocation.keys()
+
+    def evaluate(self, allocation: dict[str, int]) -> dict:
+        """
+        evaluate_allocation against this context's availability.
+        """
+
+        if not self.covers(allocation):
+            return evaluate_allocation(
+                allocation=allocation,
+                available_stems=dict(zip(self.categories, self.available)),
+            )
+
+        bouquets = self.max_bouquets(self.to_vector(allocation))
+
+        # Limiting category: first in allocation order with the
+        # smallest available / per_bouquet ratio
+        limiting = None
+        limiting_ratio = inf
+
+        for category, per_bouquet in allocation.items():
+            if per_bouquet <= 0:
+                continue
+
+            ratio = self.available[self.index[category]] / per_bouquet
+            if ratio < limiting_ratio:
+                limiting_ratio = ratio
+                limiting = category
+
+        if limiting is None:
+            return {
+                "max_bouquets": 0,
+                "limiting_category": None,
+                "stranded_stems": {},
+            }
+
+        return {
+            "max_bouquets": bouquets,
+            "limiting_category": limiting,
+            "stranded_stems": self.stranded(allocation, bouquets),
+        }
+
+    def expansion_limits(
+        self,
+        allocation: dict[str, int],
+        max_bouquets: int,
+        min_bouquets: int = 1,
+    ) -> dict[str, int]:
+        """
+        max_stems_per_bouquet for every category of `allocation`.
+        """
+
+        if max_bouquets < min_bouquets:
+            return {c: -1 for c in allocation}
+
+        if min_bouquets <= 0:
+            return {c: self.upper[self.index[c]] for c in allocation}
+
+        return {
+            c: min(self.upper[i], self.available[i] // min_bouquets)
+            for c, i in zip(allocation, map(self.index.__getitem__, allocation))
+        }
+
+    def stranded(self, allocation: dict[str, int], bouquets: int) -> dict[str, int]:
+        """
+        Stems of each category left over after `bouquets` bouquets.
+        """
+
+        return {
+            c: self.available[self.index[c]] - x * bouquets
+            for c, x in allocation.items()
+        }
+
+
+class AllocationSpace:
+    """
+    Precomputed vectors for one allocation search: those of an
+    AllocationContext (categories, index, available, lower, upper,
+    context) plus
+
+    - compensators: per category, indices it may shift a stem to
+    - compensator_masks: the same as bitmasks (bit j set if a stem
+      may shift to category j)
+
+    Pass the run's `context` to reuse its tables; without one (or if
+    its categories differ) a context is built for this space.
+    """
+
+    __slots__ = (
+        "context",
+        "categories",
+        "index",
+        "available",
+        "lower",
+        "upper",
+        "compensators",
+        "compensator_masks",
+    )
+
+    def __init__(
+        self,
+        categories,
+        available_stems: dict[str, int],
+        stem_bounds: dict[str, dict[str, float]],
+        compensation_rules: dict[str, set[str]],
+        context: AllocationContext = None,
+    ):
+        if context is None or not context.matches(categories):
+            context = AllocationContext(
+                categories=categories,
+                available_stems=available_stems,
+                stem_bounds=stem_bounds,
+            )
+
+        self.context = context
+        self.categories = context.categories
+        self.index = context.index
+        self.available = context.available
+        self.lower = context.lower
+        self.upper = context.upper
+
+        self.compensators = tuple(
+            tuple(
+                self.index[comp]
+                for comp in category_order(compensation_rules.get(c, ()))
+                if comp in self.index
+            )
+            for c in self.categories
+        )
+
+        self.compensator_masks = tuple(
+            sum(1 << j for j in targets) for targets in self.compensators
+        )
+
+    def to_vector(self, allocation: dict[str, int]) -> tuple:
+        return tuple(allocation.get(c, 0) for c in self.categories)
+
+    def weights(self, per_category: dict[str, float]) -> tuple:
+        return tuple(float(per_category.get(c, 0.0)) for c in self.categories)
+
+    def to_dict(self, vector: tuple, key_order=None) -> dict[str, int]:
+        keys = self.categories if key_order is None else key_order
+        return {c: vector[self.index[c]] for c in keys}
+
+
+class AllocationKeys:
+    """
+    Mixed-radix integer keys for the allocations one search can reach.
+
+    Category i stays within low[i]..high[i], so an allocation encodes
+    as sum((x[i] - low[i]) * strides[i]) with strides[0] = 1 and
+    strides[i + 1] = strides[i] * (high[i] - low[i] + 1). A move
+    changes one or two categories by one stem, so the searches update
+    a key by a stride or two instead of re-encoding the vector.
+
+    Reductions stop at the effective lower bound, and a category only
+    grows as a compensator, by at most one stem per move and never
+    past absolute_max.
+    """
+
+    __slots__ = ("low", "strides", "size")
+
+    def __init__(self, space: AllocationSpace, roots, max_depth: int):
+        targets = {j for comps in space.compensators for j in comps}
+
+        self.low = []
+        self.strides = []
+        self.size = 1
+
+        for i in range(len(space.categories)):
+            values = [root[i] for root in roots]
+
+            low = min(values + [space.lower[i]])
+            high = max(values)
+
+            if i in targets:
+                high = max(high, min(space.upper[i], high + max_depth))
+
+            self.low.append(low)
+            self.strides.append(self.size)
+            self.size *= high - low + 1
+
+        self.low = tuple(self.low)
+        self.strides = tuple(self.strides)
+
+    def encode(self, vector: tuple) -> int:
+        return sum(
+            (x - low) * stride
+            for x, low, stride in zip(vector, self.low, self.strides)
+        )
+
+    def visited_table(self, max_value: int = 1):
+        """
+        Empty visited table: table[key] is 0 for unseen allocations and
+        can be set to an int in 1..max_value.
+        """
+
+        if self.size <= VISITED_TABLE_MAX_STATES and max_value <= 255:
+            return bytearray(self.size)
+
+        return defaultdict(int)
+
+
+def visited_table_bytes(table) -> int:
+    """
+    Approximate memory held by a visited table, in bytes.
+    """
+
+    size = sys.getsizeof(table)
+
+    if isinstance(table, dict) and table:
+        # Keys are ints; values are small ints cached by Python
+        size += len(table) * sys.getsizeof(next(iter(table)))
+
+    return size
+
+
+class PriceCandidates:
+    """
+    Allocations at the best bouquet count found so far that rank first
+    for some target price.
+
+    For a target T the winner is the least-penalty allocation costing
+    at most T (the dearest of those on a tie), or, if all cost more,
+    the least-penalty and then cheapest one. An allocation can
+    therefore only win if nothing at most as dear strands as little,
+    so entries are kept sorted by strictly increasing cost with
+    non-increasing penalty, and every lookup is a bisection. The set
+    depends on counts, waste and cost only; best(target_price) applies
+    the price ranking afterwards, which lets one search serve every
+    target price in a sweep.
+    """
+
+    __slots__ = (
+        "space",
+        "key_order",
+        "bouquets",
+        "costs",
+        "penalties",
+        "vectors",
+    )
+
+    def __init__(self, space: AllocationSpace, key_order=None):
+        self.space = space
+        self.key_order = key_order
+        self.bouquets = -1
+
+        self.costs = []
+        self.penalties = []
+        self.vectors = []
+
+    def offer(self, bouquets: int, penalty: float, cost: float, vector: tuple):
+        if bouquets < self.bouquets:
+            return
+
+        if bouquets > self.bouquets:
+            self.bouquets = bouquets
+            self.costs = []
+            self.penalties = []
+            self.vectors = []
+
+        costs = self.costs
+        penalties = self.penalties
+
+        # Least penalty among entries at most this dear
+        i = bisect_right(costs, cost)
+
+        if i and (penalties[i - 1] < penalty or (
+            penalties[i - 1] == penalty and costs[i - 1] == cost
+        )):
+            return
+
+        # Drop the dearer entries that strand more (the same cost can
+        # only be at i - 1, with a larger penalty)
+        start = i - 1 if i and costs[i - 1] == cost else i
+        end = start
+
+        while end < len(costs) and penalties[end] > penalty:
+            end += 1
+
+        costs[start:end] = [cost]
+        penalties[start:end] = [penalty]
+        self.vectors[start:end] = [vector]
+
+    def excludes(self, penalty: float, cost: float) -> bool:
+        """
+        True if an entry at most `cost` strands less than `penalty`.
+        """
+
+        i = bisect_right(self.costs, cost)
+
+        return bool(i) and self.penalties[i - 1] < penalty
+
+    def best(self, target_price: float) -> Optional[dict]:
+        """
+        {allocation, evaluation} of the entry ranked first at
+        `target_price`, or None if nothing was ever offered.
+        """
+
+        if not self.vectors:
+            return None
+
+        i = bisect_right(self.costs, target_price)
+
+        if i:
+            vector = self.vectors[i - 1]
+        else:
+            # Nothing affordable: the cheapest least-penalty entry
+            least = self.penalties[-1]
+            vector = self.vectors[self.penalties.index(least)]
+
+        allocation = self.space.to_dict(vector, key_order=self.key_order)
+
+        return {
+            "allocation": allocation,
+            "evaluation": self.space.context.evaluate(allocation),
+        }
+
+
+class _Objective:
+    """
+    Allocation ranking shared by the searches, larger is better:
+
+        (bouquets, cost <= target_price, -waste penalty,
+         -|cost - target_price|)
+
+    Phase 3D only adds stems, so an allocation that already costs more
+    than the target cannot be priced back onto it; those rank below
+    any affordable allocation with the same count. Without waste
+    weights only the bouquet count is ranked; without a target price
+    the price terms are constant.
+
+    With waste weights and prices but no target price, `candidates`
+    is a PriceCandidates the searches offer every allocation at the
+    best count to, so the price terms can be applied afterwards.
+
+    Nodes carry weight = sum(w * x) and their cost, which moves update
+    by one or two terms; penalty = total_weight - bouquets * weight.
+    """
+
+    __slots__ = (
+        "rank_waste",
+        "rank_price",
+        "target_price",
+        "weights",
+        "prices",
+        "total_weight",
+        "max_gain",
+        "candidates",
+        "max_price",
+        "lower",
+    )
+
+    def __init__(
+        self,
+        space: AllocationSpace,
+        waste_weights,
+        avg_wholesale_prices,
+        target_price,
+        key_order=None,
+    ):
+        self.rank_waste = waste_weights is not None
+        self.rank_price = self.rank_waste and target_price is not None
+        self.target_price = target_price
+
+        self.candidates = None
+        if (
+            self.rank_waste
+            and avg_wholesale_prices is not None
+            and target_price is None
+        ):
+            self.candidates = PriceCandidates(space, key_order=key_order)
+
+        self.weights = space.weights(waste_weights or {})
+        self.prices = space.weights(avg_wholesale_prices or {})
+
+        self.total_weight = sum(
+            w * a for w, a in zip(self.weights, space.available)
+        )
+
+        # Most the weight can grow in one move (a stem shifted to a
+        # higher-weighted compensator)
+        self.max_gain = max(
+            [0.0] + [
+                self.weights[j] - self.weights[i]
+                for i in range(len(space.compensators))
+                for j in space.compensators[i]
+            ]
+        )
+
+        # Most the cost can drop in one move
+        self.max_price = max([0.0] + list(self.prices))
+        self.lower = space.lower
+
+    def node(self, vector: tuple) -> tuple:
+        """
+        (weight, cost) of an allocation vector.
+        """
+
+        return (
+            sum(w * x for w, x in zip(self.weights, vector)),
+            sum(p * x for p, x in zip(self.prices, vector)),
+        )
+
+    def rank(self, bouquets: int, weight: float, cost: float) -> tuple:
+        if not self.rank_waste:
+            return (bouquets,)
+
+        penalty = self.total_weight - bouquets * weight
+
+        if not self.rank_price:
+            return (bouquets, True, -penalty, 0.0)
+
+        return (
+            bouquets,
+            cost <= self.target_price,
+            -penalty,
+            -abs(cost - self.target_price),
+        )
+
+    def offer(self, bouquets: int, weight: float, cost: float, vector: tuple):
+        """
+        Offer an evaluated allocation to `candidates`, if collecting.
+        """
+
+        if self.candidates is not None:
+            self.candidates.offer(
+                bouquets, self.total_weight - bouquets * weight, cost, vector
+            )
+
+    def cannot_beat(
+        self,
+        bouquets: int,
+        vector: tuple,
+        weight: float,
+        cost: float,
+        moves_left: int,
+        best_rank: tuple,
+    ) -> bool:
+        """
+        True if no allocation within `moves_left` moves of a node with
+        this weight and cost can outrank `best_rank` at `bouquets`
+        bouquets: the best is affordable and even the smallest
+        reachable penalty is above its penalty.
+
+        When collecting candidates, True if none of those allocations
+        could join them: an entry no dearer than the cheapest of them
+        strands less than the smallest reachable penalty. No category
+        drops below min(x, lower), and no move cuts more than max_price.
+        """
+
+        floor = self.total_weight - bouquets * (weight + moves_left * self.max_gain)
+
+        if self.candidates is not None:
+            cheapest = max(
+                cost - moves_left * self.max_price,
+                sum(
+                    p * (x if x < low else low)
+                    for p, x, low in zip(self.prices, vector, self.lower)
+                ),
+            )
+            return self.candidates.excludes(floor, cheapest)
+
+        if not best_rank[1]:
+            return False
+
+        return floor > -best_rank[2]
+
+
+def _evaluate_vector(vector: tuple, available: tuple) -> tuple:
+    """
+    Return (max_bouquets, limiting_index) for an allocation vector.
+
+    limiting_index is None when no category uses any stems.
+    """
+
+    limiting_index = None
+    limiting_ratio = inf
+
+    for i, per_bouquet in enumerate(vector):
+        if per_bouquet <= 0:
+            continue
+
+        ratio = available[i] / per_bouquet
+        if ratio < limiting_ratio:
+            limiting_ratio = ratio
+            limiting_index = i
+
+    if limiting_index is None:
+        return 0, None
+
+    return int(limiting_ratio), limiting_index
+
+
+def max_bouquets_for_vector(vector: tuple, available: tuple) -> int:
+    """
+    Bouquet count for an allocation vector (no limiting category or
+    stranded stems). This is the hot path of the search.
+    """
+
+    best = None
+
+    for per_bouquet, avail in zip(vector, available):
+        if per_bouquet > 0:
+            count = avail // per_bouquet
+            if best is None or count < best:
+                best = count
+
+    return 0 if best is None else best
+
 def get_effective_lower_bound(
     category: str,
     stem_bounds: dict[str, dict[str, float]],
@@ -298,101 +950,596 @@ def apply_compensated_step(
 
     return results
 
+@traced("search_best_allocation")
 def search_best_allocation(
     initial_allocation: dict[str, int],
     available_stems: dict[str, int],
     stem_bounds: dict[str, dict[str, float]],
     compensation_rules: dict[str, set[str]],
     max_depth=MAX_COMPENSATION_DEPTH,
+    stats=None,
+    progress=None,
+    waste_weights=None,
+    avg_wholesale_prices=None,
+    target_price=None,
+    context=None,
 ) -> dict:
     """
     Phase 3C.3 – bounded lookahead search for best allocation.
 
-    Explores reductions across all categories, allowing neutral moves,
-    and returns the allocation that maximizes bouquet count.
+    Explores reductions and compensated moves, up to `max_depth` moves
+    from the initial allocation, and returns the allocation that
+    maximizes bouquet count. Ties are ranked by `waste_weights`, then
+    against `target_price` at `avg_wholesale_prices` (see _Objective).
+    `context` is the run's AllocationContext; `stats` and `progress`
+    receive counters and progress updates.
+
+    Returns {allocation, evaluation, nodes_expanded, nodes_pruned,
+    visited_bytes, candidates}; candidates is a PriceCandidates when
+    ranking waste with prices but no target price, else None.
     """
 
-    from collections import deque
+    from core.batch_evaluation import max_bouquets_batch
 
-    best_allocation = initial_allocation
-    best_eval = evaluate_allocation(
-        allocation=initial_allocation,
+    space = AllocationSpace(
+        categories=initial_allocation.keys(),
         available_stems=available_stems,
+        stem_bounds=stem_bounds,
+        compensation_rules=compensation_rules,
+        context=context,
     )
+    context = space.context
+
+    available = space.available
+    lower = space.lower
+    upper = space.upper
+    compensators = space.compensators
+
+    objective = _Objective(
+        space=space,
+        waste_weights=waste_weights,
+        avg_wholesale_prices=avg_wholesale_prices,
+        target_price=target_price,
+        key_order=initial_allocation,
+    )
+
+    rank = objective.rank
+    rank_waste = objective.rank_waste
+    weights = objective.weights
+    prices = objective.prices
+
+    start = space.to_vector(initial_allocation)
+    start_weight, start_cost = objective.node(start)
+
+    best_vector = start
+    best_bouquets = context.max_bouquets(start)
+    best_rank = rank(best_bouquets, start_weight, start_cost)
+    objective.offer(best_bouquets, start_weight, start_cost, start)
+
+    # No reachable allocation can beat this
+    cap = context.upper_bound(start)
+
+    # With waste ranking a tie on bouquets can still improve the result
+    slack = 1 if rank_waste else 0
+
+    # Visited allocations by integer key: a bytearray when the state
+    # space is small, else a dict
+    keys = AllocationKeys(space, roots=[start], max_depth=max_depth)
+    strides = keys.strides
+
+    start_key = keys.encode(start)
+
+    seen = keys.visited_table()
+    seen[start_key] = 1
+
+    frontier = [(start, start_weight, start_cost, start_key)]
+    depth = 0
 
-    seen = set()
-    queue = deque([(initial_allocation, best_eval, 0)])
+    nodes_expanded = 0
+    nodes_pruned = 0
+    evaluations = 1
 
-    def key(allocation: dict[str, int]) -> tuple:
-        return tuple(sorted(allocation.items()))
+    # Level-synchronous BFS: expand the whole frontier, then score all
+    # of its children in one batch
+    while frontier and depth < max_depth and (rank_waste or best_bouquets < cap):
+        expanded = []
+        children = []
 
-    seen.add(key(initial_allocation))
+        for vector, weight, cost, key in frontier:
+            bound = context.upper_bound(vector)
 
-    while queue:
-        allocation, evaluation, depth = queue.popleft()
+            if bound + slack <= best_bouquets:
+                nodes_pruned += 1
+                continue
 
-        if depth >= max_depth:
+            # Can only tie the best count: prune if no node within the
+            # remaining depth can strand less
+            if rank_waste and bound == best_bouquets and objective.cannot_beat(
+                bound, vector, weight, cost, max_depth - depth, best_rank
+            ):
+                nodes_pruned += 1
+                continue
+
+            # Dominance: the node uses more stems everywhere for the same
+            # moves. Off when ranking waste, as it may strand less
+            if not rank_waste and any(
+                _dominates(vector, other) for other in expanded
+            ):
+                nodes_pruned += 1
+                continue
+
+            expanded.append(vector)
+            nodes_expanded += 1
+
+            if progress is not None and nodes_expanded % progress.every_nodes == 0:
+                progress.update(nodes_expanded, best_bouquets)
+
+            for i in range(len(vector)):
+                current = vector[i]
+
+                # Both move types reduce category i by 1 stem
+                if current - 1 < lower[i]:
+                    continue
+
+                reduced = vector[:i] + (current - 1,) + vector[i + 1:]
+                reduced_weight = weight - weights[i]
+                reduced_cost = cost - prices[i]
+                reduced_key = key - strides[i]
+
+                # 1. Simple reduction
+                # 2. Compensated moves (shift the stem to a compensator)
+                moves = [(reduced, reduced_weight, reduced_cost, reduced_key)]
+
+                for j in compensators[i]:
+
+                    # Cannot increase compensator
+                    if reduced[j] + 1 > upper[j]:
+                        continue
+
+                    moves.append((
+                        reduced[:j] + (reduced[j] + 1,) + reduced[j + 1:],
+                        reduced_weight + weights[j],
+                        reduced_cost + prices[j],
+                        reduced_key + strides[j],
+                    ))
+
+                for move in moves:
+                    if seen[move[3]]:
+                        continue
+
+                    seen[move[3]] = 1
+                    children.append(move)
+
+        counts = max_bouquets_batch(
+            [child[0] for child in children], available, context=context
+        )
+        evaluations += len(children)
+
+        for (child, weight, cost, _), child_bouquets in zip(children, counts):
+            if child_bouquets < best_bouquets:
+                continue
+
+            # Most bouquets; then, as Phase 3D can only add stems,
+            # affordable before over target; then least waste; then
+            # closest to target (see _Objective)
+            objective.offer(child_bouquets, weight, cost, child)
+            child_rank = rank(child_bouquets, weight, cost)
+
+            if child_rank > best_rank:
+                best_vector = child
+                best_bouquets = child_bouquets
+                best_rank = child_rank
+
+        frontier = children
+        depth += 1
+
+    if progress is not None:
+        progress.update(nodes_expanded, best_bouquets)
+
+    visited_bytes = visited_table_bytes(seen)
+
+    if stats is not None:
+        stats.add("evaluations", evaluations)
+        stats.add("nodes_expanded", nodes_expanded)
+        stats.add("nodes_pruned", nodes_pruned)
+        stats.peak("visited_bytes", visited_bytes)
+
+    best_allocation = space.to_dict(best_vector, key_order=initial_allocation)
+
+    return {
+        "allocation": best_allocation,
+        "evaluation": context.evaluate(best_allocation),
+        "nodes_expanded": nodes_expanded,
+        "nodes_pruned": nodes_pruned,
+        "visited_bytes": visited_bytes,
+        "candidates": objective.candidates,
+    }
+
+@traced("search_best_first")
+def search_best_first(
+    initial_allocation: dict[str, int],
+    available_stems: dict[str, int],
+    stem_bounds: dict[str, dict[str, float]],
+    compensation_rules: dict[str, set[str]],
+    max_depth=BEST_FIRST_MAX_DEPTH,
+    node_budget=SEARCH_NODE_BUDGET,
+    stats=None,
+    progress=None,
+    waste_weights=None,
+    avg_wholesale_prices=None,
+    target_price=None,
+    context=None,
+) -> dict:
+    """
+    Phase 3C.3 (best-first) – compensated search under a node budget.
+
+    Same moves, ranking and arguments as search_best_allocation, but
+    the most promising node (highest bouquet_upper_bound, then best
+    rank) is expanded first, starting from both the initial allocation
+    and the search_max_bouquets_exact result, for at most `node_budget`
+    expanded nodes.
+
+    Returns {allocation, evaluation, nodes_expanded, nodes_pruned,
+    budget_exhausted, visited_bytes, candidates}.
+    """
+
+    from heapq import heappop, heappush
+
+    space = AllocationSpace(
+        categories=initial_allocation.keys(),
+        available_stems=available_stems,
+        stem_bounds=stem_bounds,
+        compensation_rules=compensation_rules,
+        context=context,
+    )
+    context = space.context
+
+    lower = space.lower
+    upper = space.upper
+    masks = space.compensator_masks
+
+    objective = _Objective(
+        space=space,
+        waste_weights=waste_weights,
+        avg_wholesale_prices=avg_wholesale_prices,
+        target_price=target_price,
+        key_order=initial_allocation,
+    )
+
+    rank = objective.rank
+    rank_waste = objective.rank_waste
+    weights = objective.weights
+    prices = objective.prices
+
+    start = space.to_vector(initial_allocation)
+    max_bouquets = context.max_bouquets
+    upper_bound = context.upper_bound
+
+    cap = upper_bound(start)
+
+    # The exact search finds the most bouquets in well under a
+    # millisecond; its allocation is the incumbent and a second root,
+    # so the budget goes to waste and price among equal counts
+    seed = space.to_vector(
+        search_max_bouquets_exact(
+            initial_allocation=initial_allocation,
+            available_stems=available_stems,
+            stem_bounds=stem_bounds,
+            compensation_rules=compensation_rules,
+            waste_weights=waste_weights,
+            context=context,
+        )["allocation"]
+    )
+
+    best_vector = None
+    best_rank = None
+
+    # Heap entries: (-upper bound, -rank, depth, sequence, vector,
+    # weight, cost, key); the sequence number keeps equal keys FIFO
+    heap = []
+    sequence = 0
+
+    keys = AllocationKeys(space, roots=[seed, start], max_depth=max_depth)
+    strides = keys.strides
+
+    # Shallowest depth + 1 each allocation has been reached at
+    depths = keys.visited_table(max_value=max_depth + 1)
+    evaluations = 0
+
+    for root in (seed, start):
+        root_key = keys.encode(root)
+
+        if depths[root_key]:
             continue
 
-        for category in allocation.keys():
+        root_weight, root_cost = objective.node(root)
+        root_bouquets = max_bouquets(root)
+        root_rank = rank(root_bouquets, root_weight, root_cost)
+        objective.offer(root_bouquets, root_weight, root_cost, root)
+
+        if best_rank is None or root_rank > best_rank:
+            best_vector = root
+            best_rank = root_rank
+
+        depths[root_key] = 1
+        evaluations += 1
+
+        heappush(heap, (
+            -upper_bound(root),
+            tuple(-r for r in root_rank),
+            0,
+            sequence,
+            root,
+            root_weight,
+            root_cost,
+            root_key,
+        ))
+        sequence += 1
+
+    best_bouquets = best_rank[0]
+    slack = 1 if rank_waste else 0
+
+    nodes_expanded = 0
+    nodes_pruned = 0
+
+    while heap and nodes_expanded < node_budget:
+        if not rank_waste and best_bouquets >= cap:
+            break
+
+        neg_bound, _, depth, _, vector, weight, cost, key = heappop(heap)
+        bound = -neg_bound
+
+        # Bounds only shrink down the heap: nothing left can win
+        if bound + slack <= best_bouquets:
+            nodes_pruned += 1 + len(heap)
+            heap = []
+            break
+
+        # Reached again with more moves left since it was pushed
+        if depths[key] <= depth:
+            continue
 
-            # 1. Simple reduction
-            result = apply_single_compensation_step(
-                allocation=allocation,
-                category=category,
-                available_stems=available_stems,
-                stem_bounds=stem_bounds,
-                compensation_rules=compensation_rules,
-            )
+        if rank_waste and bound == best_bouquets and objective.cannot_beat(
+            bound, vector, weight, cost, max_depth - depth, best_rank
+        ):
+            nodes_pruned += 1
+            continue
 
-            if result is not None:
-                new_alloc = result["allocation"]
-                new_eval = result["evaluation"]
-                k = key(new_alloc)
+        nodes_expanded += 1
 
-                if k not in seen:
-                    seen.add(k)
+        if progress is not None and nodes_expanded % progress.every_nodes == 0:
+            progress.update(nodes_expanded, best_bouquets)
 
-                    if new_eval["max_bouquets"] > best_eval["max_bouquets"]:
-                        best_allocation = new_alloc
-                        best_eval = new_eval
+        child_depth = depth + 1
+        child_mark = child_depth + 1
 
-                    queue.append((new_alloc, new_eval, depth + 1))
+        for i in range(len(vector)):
+            current = vector[i]
 
-            # 2. Compensated moves
-            compensated = apply_compensated_step(
-                allocation=allocation,
-                reduce_category=category,
-                available_stems=available_stems,
-                stem_bounds=stem_bounds,
-                compensation_rules=compensation_rules,
-            )
+            # Both move types reduce category i by 1 stem
+            if current - 1 < lower[i]:
+                continue
 
-            for result in compensated:
-                new_alloc = result["allocation"]
-                new_eval = result["evaluation"]
-                k = key(new_alloc)
+            reduced = vector[:i] + (current - 1,) + vector[i + 1:]
+            reduced_weight = weight - weights[i]
+            reduced_cost = cost - prices[i]
+            reduced_key = key - strides[i]
 
-                if k in seen:
+            # 1. Simple reduction
+            # 2. Compensated moves (shift the stem to a compensator)
+            moves = [(reduced, reduced_weight, reduced_cost, reduced_key)]
+
+            mask = masks[i]
+            while mask:
+                bit = mask & -mask
+                mask ^= bit
+                j = bit.bit_length() - 1
+
+                # Cannot increase compensator
+                if reduced[j] + 1 > upper[j]:
                     continue
 
-                seen.add(k)
+                moves.append((
+                    reduced[:j] + (reduced[j] + 1,) + reduced[j + 1:],
+                    reduced_weight + weights[j],
+                    reduced_cost + prices[j],
+                    reduced_key + strides[j],
+                ))
+
+            for child, child_weight, child_cost, child_key in moves:
+                known = depths[child_key]
+
+                if known and known <= child_mark:
+                    continue
 
-                if new_eval["max_bouquets"] > best_eval["max_bouquets"]:
-                    best_allocation = new_alloc
-                    best_eval = new_eval
+                depths[child_key] = child_mark
 
-                queue.append((new_alloc, new_eval, depth + 1))
+                child_bouquets = max_bouquets(child)
+                evaluations += 1
 
-            # Update best if strictly better
-            if new_eval["max_bouquets"] > best_eval["max_bouquets"]:
-                best_allocation = new_alloc
-                best_eval = new_eval
+                child_rank = rank(child_bouquets, child_weight, child_cost)
+                objective.offer(child_bouquets, child_weight, child_cost, child)
 
-            queue.append((new_alloc, new_eval, depth + 1))
+                if child_rank > best_rank:
+                    best_vector = child
+                    best_bouquets = child_bouquets
+                    best_rank = child_rank
+
+                if child_depth < max_depth:
+                    heappush(heap, (
+                        -upper_bound(child),
+                        tuple(-r for r in child_rank),
+                        child_depth,
+                        sequence,
+                        child,
+                        child_weight,
+                        child_cost,
+                        child_key,
+                    ))
+                    sequence += 1
+
+    # Out of budget with nodes left: the best so far is returned
+    budget_exhausted = nodes_expanded >= node_budget and bool(heap)
+    visited_bytes = visited_table_bytes(depths)
+
+    if progress is not None:
+        progress.update(nodes_expanded, best_bouquets)
+
+    if stats is not None:
+        stats.add("evaluations", evaluations)
+        stats.add("nodes_expanded", nodes_expanded)
+        stats.add("nodes_pruned", nodes_pruned)
+        stats.peak("visited_bytes", visited_bytes)
+
+        if budget_exhausted:
+            stats.add("budget_exhausted")
+
+    best_allocation = space.to_dict(best_vector, key_order=initial_allocation)
 
     return {
         "allocation": best_allocation,
-        "evaluation": best_eval,
+        "evaluation": context.evaluate(best_allocation),
+        "nodes_expanded": nodes_expanded,
+        "nodes_pruned": nodes_pruned,
+        "budget_exhausted": budget_exhausted,
+        "visited_bytes": visited_bytes,
+        "candidates": objective.candidates,
     }
 
+def bouquet_upper_bound(space: AllocationSpace, vector: tuple) -> int:
+    """
+    Most bouquets any allocation reachable from `vector` can make.
+
+    Moves only ever lower a category to its effective lower bound
+    (or raise a compensator), so taking every reducible category to
+    that floor gives an upper bound on the bouquet count.
+    """
+
+    return space.context.upper_bound(vector)
+
+def _dominates(vector: tuple, other: tuple) -> bool:
+    """
+    True if `vector` uses at least as many stems as `other` everywhere.
+    """
+
+    return all(a >= b for a, b in zip(vector, other))
+
+@traced("search_max_bouquets_exact")
+def search_max_bouquets_exact(
+    initial_allocation: dict[str, int],
+    available_stems: dict[str, int],
+    stem_bounds: dict[str, dict[str, float]],
+    compensation_rules: dict[str, set[str]],
+    stats=None,
+    progress=None,
+    waste_weights=None,
+    context=None,
+) -> dict:
+    """
+    Phase 3C.3 (exact) – bouquet-count maximizer.
+
+    Reductions can only take a category down to its effective lower
+    bound, so max_bouquets = min(available // per_bouquet) is largest
+    when every category sits at that floor. Candidate bouquet counts
+    are tried from that cap downwards; for each count n, a category
+    keeps min(initial, available // n) stems, and the count is feasible
+    if no category falls below its floor. Feasibility is monotone in n,
+    so the first feasible count is optimal.
+
+    Stems removed from a category are then handed to its compensators
+    where that does not lower the bouquet count or break absolute_max.
+    With `waste_weights` each stem goes to the compensator with the
+    highest waste weight, which strands the least weighted stock.
+
+    Returns the same {allocation, evaluation} shape as
+    search_best_allocation. Runtime does not depend on search depth.
+    `progress` counts each bouquet count tried as one node.
+    """
+
+    space = AllocationSpace(
+        categories=initial_allocation.keys(),
+        available_stems=available_stems,
+        stem_bounds=stem_bounds,
+        compensation_rules=compensation_rules,
+        context=context,
+    )
+    context = space.context
+
+    available = space.available
+    start = space.to_vector(initial_allocation)
+
+    # Smallest per-bouquet count reachable by single-stem reductions
+    floors = tuple(min(x, lower) for x, lower in zip(start, space.lower))
+
+    best_vector = start
+    best_bouquets = context.max_bouquets(start)
+    cap = context.upper_bound(start)
+
+    tried = 0
+
+    for tried, bouquets in enumerate(range(cap, 0, -1), start=1):
+        if stats is not None:
+            stats.add("exact_counts_tried")
+
+        if progress is not None and tried % progress.every_nodes == 0:
+            progress.update(tried, best_bouquets)
+
+        candidate = tuple(
+            min(x, avail // bouquets) for x, avail in zip(start, available)
+        )
+
+        if all(x >= f for x, f in zip(candidate, floors)):
+            best_vector = _compensate_reductions(
+                space=space,
+                start=start,
+                vector=candidate,
+                bouquets=bouquets,
+                weights=space.weights(waste_weights or {}),
+            )
+            best_bouquets = bouquets
+            break
+
+    if progress is not None:
+        progress.update(tried, best_bouquets)
+
+    best_allocation = space.to_dict(best_vector, key_order=initial_allocation)
+
+    return {
+        "allocation": best_allocation,
+        "evaluation": context.evaluate(best_allocation),
+    }
+
+def _compensate_reductions(
+    space: AllocationSpace,
+    start: tuple,
+    vector: tuple,
+    bouquets: int,
+    weights: tuple = None,
+) -> tuple:
+    """
+    Give each stem removed from `start` to one of its category's
+    compensators, as long as `bouquets` bouquets remain possible.
+    The highest-weighted compensator is preferred (when `weights` are
+    given), then the least-increased one.
+    """
+
+    if weights is None:
+        weights = (0.0,) * len(vector)
+
+    result = list(vector)
+
+    for i, removed in enumerate(s - x for s, x in zip(start, vector)):
+        for _ in range(removed):
+            legal = [
+                j for j in space.compensators[i]
+                if result[j] + 1 <= space.upper[j]
+                and (result[j] + 1) * bouquets <= space.available[j]
+            ]
+
+            if not legal:
+                break
+
+            j = min(legal, key=lambda k: (-weights[k], result[k] - start[k]))
+            result[j] += 1
+
+    return tuple(result)
@@ -0,0 +1,187 @@
+"""
+Optional run statistics for the optimizer pipeline.
+
+Functions that support tracing take a `stats` keyword argument.
+When it is None (the default) nothing is recorded, so untraced runs
+pay at most an `is None` check per call.
+"""
+
+import functools
+from contextlib import contextmanager
+from time import perf_counter
+
+
+class SearchStats:
+    """
+    Counters and wall times collected during one optimization run.
+
+    - phases: seconds spent in each optimize_bouquets phase
+    - calls: per traced function, number of calls and total seconds
+    - counters: evaluations, nodes expanded/pruned, expansion steps, ...
+    """
+
+    def __init__(self):
+        self.phases: dict = {}
+        self.calls: dict = {}
+        self.counters: dict = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            self.add_phase_time(name, perf_counter() - start)
+
+    def add_phase_time(self, name: str, seconds: float) -> None:
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def record_call(self, name: str, seconds: float) -> None:
+        entry = self.calls.setdefault(name, {"count": 0, "seconds": 0.0})
+        entry["count"] += 1
+        entry["seconds"] += seconds
+
+    def add(self, counter: str, amount: int = 1) -> None:
+        self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def peak(self, counter: str, value: int) -> None:
+        """
+        Keep the largest `value` seen for `counter`.
+        """
+
+        self.counters[counter] = max(self.counters.get(counter, 0), value)
+
+    def as_dict(self) -> dict:
+        return {
+            "phases": {k: round(v, 6) for k, v in self.phases.items()},
+            "calls": {
+                k: {"count": v["count"], "seconds": round(v["seconds"], 6)}
+                for k, v in self.calls.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+
+def _no_lap(name: str) -> None:
+    pass
+
+
+def lap_timer(stats):
+    """
+    Return `lap(name)`, which records the time since the previous lap
+    (or since lap_timer was called) as phase `name`.
+
+    With stats disabled, `lap` does nothing.
+    """
+
+    if stats is None:
+        return _no_lap
+
+    last = [perf_counter()]
+
+    def lap(name: str) -> None:
+        now = perf_counter()
+        stats.add_phase_time(name, now - last[0])
+        last[0] = now
+
+    return lap
+
+
+def traced(name: str):
+    """
+    Record call count and wall time of the decorated function whenever
+    it is called with a `stats=` keyword argument.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            stats = kwargs.get("stats")
+
+            if stats is None:
+                return func(*args, **kwargs)
+
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.record_call(name, perf_counter() - start)
+
+        return wrapper
+
+    return decorator
+
+
+# -----------------------------
+# Progress and cancellation
+# -----------------------------
+
+# How often the searches report progress and check for cancellation
+PROGRESS_EVERY_NODES = 200
+
+
+class OptimizationCancelled(Exception):
+    """
+    Raised inside an optimization run whose cancel event was set.
+    """
+
+
+class ProgressReporter:
+    """
+    Progress callback and cancel flag for one optimization run.
+
+    `callback(event)` receives {phase, nodes_expanded, best_bouquets}
+    whenever a phase starts and every PROGRESS_EVERY_NODES search
+    nodes. If `cancel_event` (a threading.Event) is set, the next
+    report raises OptimizationCancelled, so cancellation takes effect
+    at the same points.
+
+    Functions that support progress take a `progress` keyword argument;
+    None (the default) disables reporting.
+    """
+
+    def __init__(self, callback=None, cancel_event=None, every_nodes=PROGRESS_EVERY_NODES):
+        self.callback = callback
+        self.cancel_event = cancel_event
+        self.every_nodes = every_nodes
+
+        self.phase_name = None
+        self.nodes_expanded = 0
+        self.best_bouquets = None
+
+    def phase(self, name: str) -> None:
+        self.phase_name = name
+        self.report()
+
+    def update(self, nodes_expanded: int, best_bouquets: int) -> None:
+        self.nodes_expanded = nodes_expanded
+        self.best_bouquets = best_bouquets
+        self.report()
+
+    def report(self) -> None:
+        self.check_cancelled()
+
+        if self.callback is not None:
+            self.callback({
+                "phase": self.phase_name,
+                "nodes_expanded": self.nodes_expanded,
+                "best_bouquets": self.best_bouquets,
+            })
+
+    def check_cancelled(self) -> None:
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise OptimizationCancelled(
+                f"Optimization cancelled during {self.phase_name or 'start-up'}."
+            )
+
+
+def phase_announcer(progress):
+    """
+    Return `announce(name)`, which reports the start of phase `name`
+    to `progress`. With progress disabled, `announce` does nothing.
+    """
+
+    if progress is None:
+        return _no_lap
+
+    return progress.phase
@@ -0,0 +1,187 @@
+"""
+Mixed-integer solver backend for bouquet allocation.
+
+Formulates Phases 3C–3F as integer programs solved with PuLP's
+bundled CBC. For a fixed bouquet count n:
+
+    x_c integer, lower_c <= x_c <= min(upper_c, available_c // n)
+    |sum(price_c * x_c) - target_price| <= price_tolerance
+    minimize sum(w_c * (available_c - n * x_c))   (weighted stranded stems)
+
+lower_c / upper_c are the integer stem bounds of the AllocationSpace,
+w_c the WASTE_WEIGHTS. Feasibility is monotone in n (a smaller n only
+loosens the availability caps), so the largest feasible n is found by
+binary search and its program is solved for the least waste.
+
+PuLP is optional. Without it, or when a solve does not finish within
+the time limit, solve_allocation_mip returns None and callers fall
+back to the heuristic pipeline.
+"""
+
+import time
+from typing import Dict, Optional
+
+from core.compensation import AllocationSpace, bouquet_upper_bound
+
+# Wall-clock budget for all solves of one allocation
+MIP_TIME_LIMIT_SECONDS = 10.0
+
+
+class _SolveIncomplete(Exception):
+    """
+    A solve ended without a proven answer (time limit or solver error).
+    """
+
+
+def solve_allocation_mip(
+    initial_allocation: Dict[str, int],
+    available_stems: Dict[str, int],
+    stem_bounds: Dict[str, Dict[str, float]],
+    avg_wholesale_prices: Dict[str, float],
+    target_price: float,
+    waste_weights: Dict[str, float],
+    price_tolerance: float,
+    time_limit: float = MIP_TIME_LIMIT_SECONDS,
+    stats=None,
+) -> Optional[Dict]:
+    """
+    Return {allocation, max_bouquets} for the most bouquets whose
+    recipe is within `price_tolerance` of `target_price`, with the
+    least weighted stranded stems among those.
+
+    `initial_allocation` supplies the categories and the key order of
+    the returned allocation; its values are not used.
+
+    Returns None if PuLP is missing, no bouquet count is feasible
+    within the price tolerance, or the time limit runs out.
+    """
+
+    try:
+        import pulp
+    except ImportError:
+        if stats is not None:
+            stats.add("mip_unavailable")
+        return None
+
+    space = AllocationSpace(
+        categories=initial_allocation.keys(),
+        available_stems=available_stems,
+        stem_bounds=stem_bounds,
+        compensation_rules={},
+    )
+
+    deadline = time.perf_counter() + time_limit
+
+    def solve(bouquets: int):
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise _SolveIncomplete("time limit reached")
+
+        if stats is not None:
+            stats.add("mip_solves")
+
+        return _solve_for_count(
+            pulp=pulp,
+            space=space,
+            bouquets=bouquets,
+            avg_wholesale_prices=avg_wholesale_prices,
+            target_price=target_price,
+            waste_weights=waste_weights,
+            price_tolerance=price_tolerance,
+            time_limit=remaining,
+        )
+
+    # Every category at its lower bound gives the most bouquets possible
+    hi = bouquet_upper_bound(space, space.lower)
+    lo = 0
+    best = None
+
+    try:
+        # Largest feasible count in [1, hi]
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            vector = solve(mid)
+
+            if vector is None:
+                hi = mid - 1
+            else:
+                lo = mid
+                best = vector
+
+    except _SolveIncomplete:
+        if stats is not None:
+            stats.add("mip_incomplete")
+        return None
+
+    # `best` is the solution for count `lo`
+    if best is None:
+        return None
+
+    return {
+        "allocation": space.to_dict(best, key_order=initial_allocation),
+        "max_bouquets": lo,
+    }
+
+
+def _solve_for_count(
+    pulp,
+    space: AllocationSpace,
+    bouquets: int,
+    avg_wholesale_prices: Dict[str, float],
+    target_price: float,
+    waste_weights: Dict[str, float],
+    price_tolerance: float,
+    time_limit: float,
+) -> Optional[tuple]:
+    """
+    Least-waste allocation vector for exactly `bouquets` bouquets, or
+    None if the program is infeasible.
+    """
+
+    problem = pulp.LpProblem("bouquet_allocation", pulp.LpMinimize)
+
+    stems = []
+
+    for i, category in enumerate(space.categories):
+        cap = space.available[i] // bouquets
+        upper = min(space.upper[i], cap)
+
+        if upper < space.lower[i]:
+            return None
+
+        stems.append(
+            pulp.LpVariable(
+                f"stems_{i}",
+                lowBound=space.lower[i],
+                upBound=upper,
+                cat="Integer",
+            )
+        )
+
+    cost = pulp.lpSum(
+        avg_wholesale_prices.get(category, 0) * x
+        for category, x in zip(space.categories, stems)
+    )
+
+    problem += cost <= target_price + price_tolerance
+    problem += cost >= target_price - price_tolerance
+
+    # available_c is constant, so minimizing stranded stems weighted by
+    # w_c is the same as maximizing sum(w_c * x_c)
+    problem += pulp.lpSum(
+        -waste_weights.get(category, 0.0) * bouquets * x
+        for category, x in zip(space.categories, stems)
+    )
+
+    try:
+        problem.solve(pulp.PULP_CBC_CMD(msg=False, timeLimit=time_limit))
+    except pulp.PulpSolverError as e:
+        raise _SolveIncomplete(str(e))
+
+    if problem.status == pulp.LpStatusInfeasible:
+        return None
+
+    if problem.sol_status != pulp.LpSolutionOptimal:
+        raise _SolveIncomplete(pulp.LpStatus[problem.status])
+
+    return tuple(int(round(x.value())) for x in stems)
@@ -1,19 +1,25 @@
+from math import ceil
 from typing import Dict, List, Optional
 from core.canonical_recipes import SEASON_KEY_TO_RECIPE_SEASON
 from core.canonical_recipes import CANONICAL_RECIPES
 from core.stem_scaling import calculate_stem_recipe
 from core.bouquet_sizing import estimate_bouquet_stem_count
-from core.recipe_bounds import (
-    load_recipe_bounds,
-    convert_bounds_to_percentages,
-)
+from core.recipe_bounds import get_percentage_bounds
 from core.bouquet_sizing import apply_percentage_bounds
-from core.bouquet_expansion import expand_bouquet_to_target
+from core.bouquet_expansion import (
+    EXPANSION_METHODS,
+    bisect_dp_expansion_counts,
+    expand_bouquet_for_counts,
+    iter_expansions_for_counts,
+)
+from core.instrumentation import lap_timer, phase_announcer
 from core.compensation import (
+    AllocationContext,
     initialize_allocation,
     search_best_allocation,
+    search_best_first,
+    search_max_bouquets_exact,
 )
-from pathlib import Path
 
 # -----------------------------
 # Configuration (tunable later)
@@ -29,6 +35,21 @@ COMPENSATION_RULES = {
 
 MIN_BB_STEMS = 10
 
+# Phase 3C.2 search strategies:
+#   "best_first" – exact bouquet count, then a best-first search with
+#                  COMPENSATION_RULES under a node budget for less waste
+#   "lookahead"  – bounded BFS over single-stem reductions
+#   "exact"      – bouquet-count maximizer (optimal, depth-independent)
+SEARCH_MODES = ("best_first", "lookahead", "exact")
+
+# "heuristic": Phase 3C–3F search/expansion chain
+# "mip": integer program via PuLP/CBC (core.mip_solver), falling back
+#        to the heuristic when it cannot produce an answer
+SOLVERS = ("heuristic", "mip")
+
+# Largest |bouquet cost - target price| that counts as on target
+PRICE_TOLERANCE = 1.0
+
 # Waste priority weights (higher = worse to strand)
 WASTE_WEIGHTS = {
     "Foundation": 5.0,
@@ -39,6 +60,19 @@ WASTE_WEIGHTS = {
     "Foliage": 0.5,
 }
 
+def waste_penalty(
+    stranded_stems: Dict[str, int],
+    waste_weights: Dict[str, float] = WASTE_WEIGHTS,
+) -> float:
+    """
+    Stranded stems weighted by how bad each category is to strand.
+    """
+
+    return sum(
+        waste_weights.get(category, 0.0) * stems
+        for category, stems in stranded_stems.items()
+    )
+
 ### Tier A Allocation
 
 def build_tier_a_allocation(
@@ -109,12 +143,19 @@ def build_tier_a_allocation(
 def compute_max_bouquets(
     available_stems: Dict[str, int],
     per_bouquet_allocation: Dict[str, int],
+    context: Optional[AllocationContext] = None,
 ) -> int:
     """
     Compute the maximum number of bouquets that can be made
     given per-bouquet stem requirements.
+
+    With the run's `context` (built for `available_stems`) the count
+    is read from its tables.
     """
 
+    if context is not None and context.covers(per_bouquet_allocation):
+        return context.max_bouquets(context.to_vector(per_bouquet_allocation))
+
     counts = []
 
     for category, per_bouquet in per_bouquet_allocation.items():
@@ -138,22 +179,152 @@ def optimize_bouquets(
     season_key: str,
     target_price: float,
     avg_wholesale_prices: Dict[str, float],
+    search_mode: str = "best_first",
+    stats=None,
+    progress=None,
+    solver: str = "heuristic",
+    expansion: str = "dp",
 ) -> Optional[Dict]:
     """
     Determine the best BB-compliant bouquet configuration
     given available stems and a fixed price target.
 
+    `search_mode` selects the Phase 3C.2 strategy (see SEARCH_MODES).
+    `solver="mip"` replaces Phases 3C.2–3F with an integer program (see
+    SOLVERS); if PuLP is missing, the program has no solution within
+    the price tolerance, or it times out, the heuristic runs instead.
+    `expansion` selects the Phase 3D method (see EXPANSION_METHODS in
+    core.bouquet_expansion): "dp" hits the target price as closely as
+    the limits allow, "greedy" is the original stem-by-stem expansion.
+
+    Pass a core.instrumentation.SearchStats as `stats` to collect phase
+    timings and search counters; they are returned under "stats".
+
+    Pass a core.instrumentation.ProgressReporter as `progress` to get
+    progress callbacks during the run. If its cancel event is set, the
+    run stops with OptimizationCancelled.
+
     Returns a dict with:
       - total_stems
       - recipe (per-category stem counts)
       - bouquet_cost
       - max_bouquets
       - stranded_stems
-      - waste_penalty
+      - waste_penalty (stranded stems weighted by WASTE_WEIGHTS)
 
     Returns None if no feasible configuration exists.
     """
 
+    if search_mode not in SEARCH_MODES:
+        raise ValueError(
+            f"Unknown search mode '{search_mode}'. "
+            f"Expected one of: {', '.join(SEARCH_MODES)}"
+        )
+
+    if solver not in SOLVERS:
+        raise ValueError(
+            f"Unknown solver '{solver}'. "
+            f"Expected one of: {', '.join(SOLVERS)}"
+        )
+
+    if expansion not in EXPANSION_METHODS:
+        raise ValueError(
+            f"Unknown expansion method '{expansion}'. "
+            f"Expected one of: {', '.join(EXPANSION_METHODS)}"
+        )
+
+    return _optimize_bouquets(
+        available_stems=available_stems,
+        season_key=season_key,
+        target_price=target_price,
+        avg_wholesale_prices=avg_wholesale_prices,
+        search_mode=search_mode,
+        stats=stats,
+        progress=progress,
+        solver=solver,
+        expansion=expansion,
+    )
+
+def optimize_price_sweep(
+    available_stems: Dict[str, int],
+    season_key: str,
+    prices,
+    avg_wholesale_prices: Dict[str, float],
+    search_mode: str = "best_first",
+) -> List[Dict]:
+    """
+    Run optimize_bouquets for every target price in `prices`.
+
+    Bounds are loaded once for the whole sweep, and Phase 3C.2 search
+    results are shared between prices whose Tier A allocation and
+    integer stem bounds come out the same (neighboring prices usually
+    do), so only the price-dependent phases run per price.
+
+    Returns one row per price, in the order given: the optimize_bouquets
+    result with "target_price" added.
+    """
+
+    if search_mode not in SEARCH_MODES:
+        raise ValueError(
+            f"Unknown search mode '{search_mode}'. "
+            f"Expected one of: {', '.join(SEARCH_MODES)}"
+        )
+
+    pct_bounds = get_percentage_bounds()
+    search_memo: Dict = {}
+
+    rows = []
+
+    for price in prices:
+        result = _optimize_bouquets(
+            available_stems=available_stems,
+            season_key=season_key,
+            target_price=price,
+            avg_wholesale_prices=avg_wholesale_prices,
+            search_mode=search_mode,
+            pct_bounds=pct_bounds,
+            search_memo=search_memo,
+        )
+
+        if result is None:
+            result = {"error": "No feasible bouquet configuration at this price."}
+
+        rows.append({"target_price": price, **result})
+
+    return rows
+
+def _optimize_bouquets(
+    available_stems: Dict[str, int],
+    season_key: str,
+    target_price: float,
+    avg_wholesale_prices: Dict[str, float],
+    search_mode: str = "best_first",
+    stats=None,
+    pct_bounds=None,
+    search_memo=None,
+    progress=None,
+    solver: str = "heuristic",
+    expansion: str = "dp",
+) -> Optional[Dict]:
+    """
+    optimize_bouquets without the option checks. `pct_bounds` and
+    `search_memo` let callers running many prices share loaded bounds
+    and search results.
+
+    Raises ValueError for negative available stems.
+    """
+
+    negative = [c for c, stems in available_stems.items() if stems < 0]
+    if negative:
+        raise ValueError(
+            f"Available stems cannot be negative: {', '.join(negative)}"
+        )
+
+    lap = lap_timer(stats)
+    announce = phase_announcer(progress)
+
+    announce("3A sizing")
+
     recipe_percentages = CANONICAL_RECIPES[season_key]
 
     # ----------------------------------
@@ -163,8 +334,11 @@ def optimize_bouquets(
         target_price=target_price,
         canonical_percentages=recipe_percentages,
         avg_wholesale_prices=avg_wholesale_prices,
+        stats=stats,
     )
 
+    lap("3A sizing")
+
     # ----------------------------------
     # Hard Stop #1: Minimum viable BB bouquet size
     # ----------------------------------
@@ -197,11 +371,8 @@ def optimize_bouquets(
     # Phase 3B: Apply recipe bounds
     # ----------------------------------
 
-    BASE_DIR = Path(__file__).parent.parent
-    BOUNDS_PATH = BASE_DIR / "data" / "BB_recipe_bounds.xlsx"
-
-    raw_bounds = load_recipe_bounds(BOUNDS_PATH)
-    pct_bounds = convert_bounds_to_percentages(raw_bounds)
+    if pct_bounds is None:
+        pct_bounds = get_percentage_bounds(stats=stats)
 
     recipe_season = SEASON_KEY_TO_RECIPE_SEASON[season_key]
     pct_bounds_for_season = pct_bounds[recipe_season]
@@ -211,6 +382,8 @@ def optimize_bouquets(
         pct_bounds_for_season=pct_bounds_for_season,
     )
 
+    lap("3B bounds")
+
 ### PHASE 3C - Allocation, scarcity and compensation
 
     # ----------------------------------
@@ -225,93 +398,150 @@ def optimize_bouquets(
     if tier_a_allocation is None:
         return None
 
+    # Bouquet-count tables shared by the search and expansion phases
+    context = AllocationContext(
+        categories=tier_a_allocation.keys(),
+        available_stems=available_stems,
+        stem_bounds=stem_bounds,
+    )
+
+    lap("3C.1 tier A")
+
+    if solver == "mip":
+        announce("MIP solve")
+
+        mip_result = _optimize_with_mip(
+            tier_a_allocation=tier_a_allocation,
+            available_stems=available_stems,
+            stem_bounds=stem_bounds,
+            avg_wholesale_prices=avg_wholesale_prices,
+            target_price=target_price,
+            stats=stats,
+        )
+
+        lap("MIP solve")
+
+        if mip_result is not None:
+            return mip_result
+
+        # No MIP answer: continue with the heuristic search
+        if stats is not None:
+            stats.add("mip_fallbacks")
+
     # ----------------------------------
     # Phase 3C.2: Compensation search
     # ----------------------------------
-    
-    from core.compensation import search_best_allocation
 
-    compensation_result = search_best_allocation(
+    announce("3C.2 search")
+
+    compensation_result = _search_allocation(
+        search_mode=search_mode,
         initial_allocation=tier_a_allocation,
         available_stems=available_stems,
         stem_bounds=stem_bounds,
-        compensation_rules={},
+        stats=stats,
+        search_memo=search_memo,
+        progress=progress,
+        avg_wholesale_prices=avg_wholesale_prices,
+        target_price=target_price,
+        context=context,
     )
 
     best_allocation = compensation_result["allocation"]
     best_eval = compensation_result["evaluation"]
 
+    lap("3C.2 search")
+
+    # ----------------------------------
+    # Hard Stop #3: Not a single bouquet possible
+    # ----------------------------------
+
+    if best_eval["max_bouquets"] <= 0:
+        # Categories that cannot go below a per-bouquet minimum
+        # larger than what is available
+        short = [
+            category for category, stems in best_allocation.items()
+            if available_stems.get(category, 0)
+            < min(stems, ceil(stem_bounds[category]["absolute_min"]))
+        ]
+
+        if short:
+            message = (
+                f"There are not enough {short[0]} stems for even one bouquet "
+                "at this price. Please adjust availability."
+            )
+        else:
+            message = (
+                "Could not find a bouquet recipe these stems can make "
+                "at this price. Please adjust availability or price."
+            )
+
+        return {"error": message}
+
     # ----------------------------------
     # Phase 3D: Bouquet expansion (price-aware, bouquet-count-flexible)
     # ----------------------------------
 
-    PRICE_TOLERANCE = 1.0
-    
-    from core.bouquet_expansion import expand_bouquet_to_target
-    from core.compensation import evaluate_allocation
+    announce("3D/3E expansion")
 
-    expanded_allocation = None
-    final_eval = None
-    bouquet_cost = None
-    price_delta = None
+    # Rows of one expansion table share allocation dicts,
+    # so each distinct allocation is evaluated once
+    evaluations = {}
 
-    # Try current bouquet count, then slightly fewer if needed
-    MAX_BOUQUET_REDUCTION = 3
+    def evaluate_row(row: Dict) -> Dict:
+        key = id(row["allocation"])
 
-    for bouquet_count in range(
-        best_eval["max_bouquets"],
-        max(0, best_eval["max_bouquets"] - MAX_BOUQUET_REDUCTION),
-        -1,
-    ):
-        candidate_allocation = expand_bouquet_to_target(
-            base_allocation=best_allocation,
-            max_bouquets=bouquet_count,
-            stem_bounds=stem_bounds,
-            available_stems=available_stems,
-            avg_wholesale_prices=avg_wholesale_prices,
-            target_price=target_price,
-        )
+        if key not in evaluations:
+            evaluations[key] = context.evaluate(row["allocation"])
 
-        candidate_eval = evaluate_allocation(
-            allocation=candidate_allocation,
-            available_stems=available_stems,
-        )
+            if stats is not None:
+                stats.add("evaluations")
 
-        candidate_cost = sum(
-            candidate_allocation[c] * avg_wholesale_prices[c]
-            for c in candidate_allocation
-        )
+        return evaluations[key]
 
-        candidate_delta = candidate_cost - target_price
+    # Try current bouquet count, then slightly fewer if needed
+    MAX_BOUQUET_REDUCTION = 3
 
-        # Accept the first solution within tolerance
-        if abs(candidate_delta) <= PRICE_TOLERANCE:
-            expanded_allocation = candidate_allocation
-            final_eval = candidate_eval
-            bouquet_cost = candidate_cost
-            price_delta = candidate_delta
-            break
+    expansion_table = expand_bouquet_for_counts(
+        base_allocation=best_allocation,
+        bouquet_counts=range(
+            best_eval["max_bouquets"],
+            max(0, best_eval["max_bouquets"] - MAX_BOUQUET_REDUCTION),
+            -1,
+        ),
+        stem_bounds=stem_bounds,
+        available_stems=available_stems,
+        avg_wholesale_prices=avg_wholesale_prices,
+        target_price=target_price,
+        method=expansion,
+        stats=stats,
+        context=context,
+    )
 
-    # Fallback: if nothing hit tolerance, use the closest one we saw
-    if expanded_allocation is None:
-        expanded_allocation = candidate_allocation
-        final_eval = candidate_eval
-        bouquet_cost = candidate_cost
-        price_delta = candidate_delta
+    # Accept the first solution within tolerance; if nothing hit
+    # tolerance, fall back to the last (fewest bouquets) one
+    chosen_row = next(
+        (
+            row for row in expansion_table
+            if abs(row["price_delta"]) <= PRICE_TOLERANCE
+        ),
+        expansion_table[-1],
+    )
+
+    expanded_allocation = chosen_row["allocation"]
+    final_eval = evaluate_row(chosen_row)
 
     # ----------------------------------
     # Phase 3E: Compute actual bouquet cost
     # ----------------------------------
 
-    bouquet_cost = sum(
-        expanded_allocation[category] * avg_wholesale_prices[category]
-        for category in expanded_allocation
-    )
+    bouquet_cost = chosen_row["bouquet_cost"]
+    price_delta = chosen_row["price_delta"]
 
-    price_delta = bouquet_cost - target_price
-    
     within_tolerance = abs(price_delta) <= PRICE_TOLERANCE
 
+    lap("3D/3E expansion")
+
     # ----------------------------------
     # Phase 3F: Price rescue by relaxing bouquet count
     # ----------------------------------
@@ -328,38 +558,63 @@ def optimize_bouquets(
 
     best_distance = abs(price_delta)
 
-    if price_delta < -UNDERPRICE_TOLERANCE:
-        for reduced_bouquets in range(final_eval["max_bouquets"] - 1, 0, -1):
+    if price_delta < -UNDERPRICE_TOLERANCE and expansion == "dp":
+        announce("3F price rescue")
 
-            trial_allocation = expand_bouquet_to_target(
-                base_allocation=best_allocation,
-                max_bouquets=reduced_bouquets,
-                stem_bounds=stem_bounds,
-                available_stems=available_stems,
-                avg_wholesale_prices=avg_wholesale_prices,
-                target_price=target_price,
-            )
+        # DP rows only get closer as the count drops: bisect the count
+        row = bisect_dp_expansion_counts(
+            base_allocation=best_allocation,
+            max_count=final_eval["max_bouquets"] - 1,
+            stem_bounds=stem_bounds,
+            available_stems=available_stems,
+            avg_wholesale_prices=avg_wholesale_prices,
+            target_price=target_price,
+            tolerance=PRICE_TOLERANCE,
+            stats=stats,
+            context=context,
+        )
 
-            trial_eval = evaluate_allocation(
-                allocation=trial_allocation,
-                available_stems=available_stems,
-            )
+        if row is not None and abs(row["price_delta"]) < best_distance:
+            best_candidate = {
+                "allocation": row["allocation"],
+                "bouquet_cost": row["bouquet_cost"],
+                "price_delta": row["price_delta"],
+                "final_eval": evaluate_row(row),
+            }
+            best_distance = abs(row["price_delta"])
 
-            trial_cost = sum(
-                trial_allocation[c] * avg_wholesale_prices[c]
-                for c in trial_allocation
-            )
+    elif price_delta < -UNDERPRICE_TOLERANCE:
+        announce("3F price rescue")
+
+        rescue_table = iter_expansions_for_counts(
+            base_allocation=best_allocation,
+            bouquet_counts=range(final_eval["max_bouquets"] - 1, 0, -1),
+            stem_bounds=stem_bounds,
+            available_stems=available_stems,
+            avg_wholesale_prices=avg_wholesale_prices,
+            target_price=target_price,
+            method=expansion,
+            stats=stats,
+            context=context,
+        )
+
+        for row in rescue_table:
+            if stats is not None:
+                stats.add("price_rescue_trials")
 
-            trial_delta = trial_cost - target_price
+            if progress is not None:
+                progress.check_cancelled()
+
+            trial_delta = row["price_delta"]
             trial_distance = abs(trial_delta)
 
             # Keep the closest-to-target candidate
             if trial_distance < best_distance:
                 best_candidate = {
-                    "allocation": trial_allocation,
-                    "bouquet_cost": trial_cost,
+                    "allocation": row["allocation"],
+                    "bouquet_cost": row["bouquet_cost"],
                     "price_delta": trial_delta,
-                    "final_eval": trial_eval,
+                    "final_eval": evaluate_row(row),
                 }
                 best_distance = trial_distance
 
@@ -373,18 +628,219 @@ def optimize_bouquets(
     price_delta = best_candidate["price_delta"]
     final_eval = best_candidate["final_eval"]
     within_tolerance = abs(price_delta) <= PRICE_TOLERANCE
-    
-    return {
+
+    lap("3F price rescue")
+
+    result = {
         "total_stems": sum(expanded_allocation.values()),
-        "recipe": expanded_allocation,
+        "recipe": dict(expanded_allocation),
         "bouquet_cost": round(bouquet_cost, 2),
         "price_delta": round(price_delta, 2),
         "within_price_tolerance": within_tolerance,
         "max_bouquets": final_eval["max_bouquets"],
         "stranded_stems": final_eval["stranded_stems"],
-        "waste_penalty": 0.0,
+        "waste_penalty": waste_penalty(final_eval["stranded_stems"]),
+    }
+
+    if stats is not None:
+        result["stats"] = stats.as_dict()
+
+    return result
+
+def _optimize_with_mip(
+    tier_a_allocation: Dict[str, int],
+    available_stems: Dict[str, int],
+    stem_bounds: Dict[str, Dict[str, float]],
+    avg_wholesale_prices: Dict[str, float],
+    target_price: float,
+    stats=None,
+) -> Optional[Dict]:
+    """
+    optimize_bouquets result from the MIP backend, or None when it has
+    no answer.
+    """
+
+    from core.bouquet_expansion import bouquet_cost as cost_of
+    from core.compensation import evaluate_allocation
+    from core.mip_solver import solve_allocation_mip
+
+    solution = solve_allocation_mip(
+        initial_allocation=tier_a_allocation,
+        available_stems=available_stems,
+        stem_bounds=stem_bounds,
+        avg_wholesale_prices=avg_wholesale_prices,
+        target_price=target_price,
+        waste_weights=WASTE_WEIGHTS,
+        price_tolerance=PRICE_TOLERANCE,
+        stats=stats,
+    )
+
+    if solution is None:
+        return None
+
+    allocation = solution["allocation"]
+    evaluation = evaluate_allocation(
+        allocation=allocation,
+        available_stems=available_stems,
+    )
+
+    cost = cost_of(allocation, avg_wholesale_prices)
+    price_delta = cost - target_price
+
+    result = {
+        "total_stems": sum(allocation.values()),
+        "recipe": dict(allocation),
+        "bouquet_cost": round(cost, 2),
+        "price_delta": round(price_delta, 2),
+        "within_price_tolerance": abs(price_delta) <= PRICE_TOLERANCE,
+        "max_bouquets": evaluation["max_bouquets"],
+        "stranded_stems": evaluation["stranded_stems"],
+        "waste_penalty": waste_penalty(evaluation["stranded_stems"]),
     }
 
+    if stats is not None:
+        result["stats"] = stats.as_dict()
+
+    return result
+
+def _search_allocation(
+    search_mode: str,
+    initial_allocation: Dict[str, int],
+    available_stems: Dict[str, int],
+    stem_bounds: Dict[str, Dict[str, float]],
+    stats=None,
+    search_memo: Optional[Dict] = None,
+    progress=None,
+    avg_wholesale_prices: Optional[Dict[str, float]] = None,
+    target_price: Optional[float] = None,
+    context: Optional[AllocationContext] = None,
+) -> Dict:
+    """
+    Phase 3C.2 dispatch. `context` is the run's AllocationContext,
+    passed on to the search.
+
+    All searches rank ties on bouquet count by WASTE_WEIGHTS; the
+    best_first and lookahead searches then by affordability and
+    |cost - target_price| when prices are given. Only best_first uses
+    COMPENSATION_RULES.
+
+    The price terms are applied after the search: best_first and
+    lookahead run without the target price and return PriceCandidates,
+    from which the allocation for `target_price` is picked.
+
+    The searches only compare stem counts against the integer ceilings
+    of lower bounds and floors of absolute maxima, so with `search_memo`
+    a search is reused for any later call whose initial allocation,
+    integer bounds and wholesale prices are the same, whatever its
+    target price.
+    """
+
+    if search_mode == "exact":
+        avg_wholesale_prices = None
+
+    memo_key = None
+
+    if search_memo is not None:
+        space = context
+        if space is None or not space.matches(initial_allocation.keys()):
+            space = AllocationContext(
+                categories=initial_allocation.keys(),
+                available_stems=available_stems,
+                stem_bounds=stem_bounds,
+            )
+
+        memo_key = (
+            search_mode,
+            tuple(initial_allocation.items()),
+            space.available,
+            space.lower,
+            space.upper,
+            tuple(sorted((avg_wholesale_prices or {}).items())),
+        )
+
+    if memo_key is not None and memo_key in search_memo:
+        result = search_memo[memo_key]
+
+        if stats is not None:
+            stats.add("search_memo_hits")
+    else:
+        result = _run_search(
+            search_mode=search_mode,
+            initial_allocation=initial_allocation,
+            available_stems=available_stems,
+            stem_bounds=stem_bounds,
+            stats=stats,
+            progress=progress,
+            avg_wholesale_prices=avg_wholesale_prices,
+            context=context,
+        )
+
+        if memo_key is not None:
+            search_memo[memo_key] = result
+
+    candidates = result.get("candidates")
+
+    if candidates is not None and target_price is not None:
+        picked = candidates.best(target_price)
+
+        # No candidates: keep the search's own (no-solution) result
+        if picked is not None:
+            result = {**result, **picked}
+
+    return result
+
+def _run_search(
+    search_mode: str,
+    initial_allocation: Dict[str, int],
+    available_stems: Dict[str, int],
+    stem_bounds: Dict[str, Dict[str, float]],
+    stats=None,
+    progress=None,
+    avg_wholesale_prices: Optional[Dict[str, float]] = None,
+    context: Optional[AllocationContext] = None,
+) -> Dict:
+    """
+    Run the Phase 3C.2 search for `search_mode`, without a target price.
+    """
+
+    if search_mode == "best_first":
+        result = search_best_first(
+            initial_allocation=initial_allocation,
+            available_stems=available_stems,
+            stem_bounds=stem_bounds,
+            compensation_rules=COMPENSATION_RULES,
+            stats=stats,
+            progress=progress,
+            waste_weights=WASTE_WEIGHTS,
+            avg_wholesale_prices=avg_wholesale_prices,
+            context=context,
+        )
+    elif search_mode == "exact":
+        result = search_max_bouquets_exact(
+            initial_allocation=initial_allocation,
+            available_stems=available_stems,
+            stem_bounds=stem_bounds,
+            compensation_rules={},
+            stats=stats,
+            progress=progress,
+            waste_weights=WASTE_WEIGHTS,
+            context=context,
+        )
+    else:
+        result = search_best_allocation(
+            initial_allocation=initial_allocation,
+            available_stems=available_stems,
+            stem_bounds=stem_bounds,
+            compensation_rules={},
+            stats=stats,
+            progress=progress,
+            waste_weights=WASTE_WEIGHTS,
+            avg_wholesale_prices=avg_wholesale_prices,
+            context=context,
+        )
+
+    return result
+
 def allocate_stems_within_bounds(
     stem_bounds: Dict[str, Dict[str, float]],
     available_stems: Dict[str, int],
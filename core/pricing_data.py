@@ -1,36 +1,155 @@
-import pandas as pd
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional
 
-def load_master_pricing(local_path: str) -> pd.DataFrame:
+from core.snapshots import read_snapshot, write_snapshot
+
+# pandas is imported where a frame is actually built, so importing
+# this module (and the optimizer through it) stays cheap
+if TYPE_CHECKING:
+    import pandas as pd
+
+MASTER_PRICING_PATH = (
+    Path(__file__).parent.parent
+    / "data"
+    / "CANONICAL Bouquet Recipe Master Sheet.xlsx"
+)
+
+MASTER_PRICING_SNAPSHOT_KIND = "master_pricing"
+
+# Workbook columns the apps use, and their internal names
+MASTER_PRICING_COLUMNS = {
+    "Season": "season_raw",
+    "Category": "category_raw",
+    "Avg. WS Price": "wholesale_price",
+}
+
+# Columns of the normalized frame
+PRICING_FRAME_COLUMNS = ["season_raw", "category", "wholesale_price"]
+
+
+def load_master_pricing(
+    local_path: str,
+    use_snapshot: bool = True,
+) -> "pd.DataFrame":
     """
     Load and normalize the Master Variety List pricing data.
 
+    Only the Season, Category and Avg. WS Price columns are read. The
+    frame has one row per priced variety:
+    - season_raw: comma-separated season labels (categorical)
+    - category: stem category, e.g. "Focal" (categorical)
+    - wholesale_price: float
+
+    If a fresh snapshot of the workbook exists it is used instead of
+    parsing Excel (openpyxl is then never imported). Otherwise the
+    workbook is parsed and a snapshot is written for next time
+    (best effort).
+
     Contract:
     - Sheet name: 'Master Variety List'
     - Required columns:
         - Season
-        
         - Category
         - Avg. WS Price
     """
 
-    # --- Load ---
+    if use_snapshot:
+        payload = read_snapshot(local_path, MASTER_PRICING_SNAPSHOT_KIND)
+        if payload is not None:
+            return _frame_from_payload(payload)
+
+    df = _read_master_pricing_excel(local_path)
+
+    if use_snapshot:
+        try:
+            write_snapshot(
+                local_path,
+                MASTER_PRICING_SNAPSHOT_KIND,
+                _frame_to_payload(df),
+            )
+        except OSError:
+            # Read-only deployments simply keep parsing Excel
+            pass
+
+    return df
+
+
+def compile_master_pricing_snapshot(
+    local_path: str = MASTER_PRICING_PATH,
+) -> Path:
+    """
+    Parse the Master Variety List workbook and (re)write its snapshot.
+    """
+
+    df = _read_master_pricing_excel(local_path)
+
+    return write_snapshot(
+        local_path,
+        MASTER_PRICING_SNAPSHOT_KIND,
+        _frame_to_payload(df),
+    )
+
+
+def _frame_to_payload(df: "pd.DataFrame") -> dict:
+    """
+    Store the frame column-wise as plain Python lists, so snapshots do
+    not depend on the pandas version that wrote them.
+    """
+
+    return {
+        "index": df.index.tolist(),
+        "columns": list(df.columns),
+        "data": [df.iloc[:, i].tolist() for i in range(df.shape[1])],
+    }
+
+
+def _frame_from_payload(payload: dict) -> "pd.DataFrame":
+    import pandas as pd
+
+    df = pd.DataFrame(
+        dict(zip(payload["columns"], payload["data"])),
+        index=payload["index"],
+    )
+
+    return _apply_pricing_dtypes(df)
+
+
+def _apply_pricing_dtypes(df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Categorical season/category columns and a float price column.
+    """
+
+    return df.astype({
+        "season_raw": "category",
+        "category": "category",
+        "wholesale_price": "float64",
+    })
+
+
+def _read_master_pricing_excel(local_path: str) -> "pd.DataFrame":
+    import pandas as pd
+
+    # --- Load (only the columns we use) ---
     df = pd.read_excel(
         local_path,
-        sheet_name="Master Variety List"
+        sheet_name="Master Variety List",
+        usecols=lambda column: str(column).strip() in MASTER_PRICING_COLUMNS,
     )
 
     # --- Normalize column names ---
     df.columns = df.columns.str.strip()
 
-    # 🔑 DROP unnamed / blank columns
-    df = df.loc[:, ~df.columns.str.contains("^Unnamed", na=False)]
-
     # --- Rename to internal-safe names ---
-    df = df.rename(columns={
-        "Season": "season_raw",
-        "Category": "category_raw",
-        "Avg. WS Price": "wholesale_price"
-    })
+    df = df.rename(columns=MASTER_PRICING_COLUMNS)
+
+    # --- Normalize Price ---
+    df["wholesale_price"] = pd.to_numeric(
+        df["wholesale_price"],
+        errors="coerce"
+    )
+
+    # --- Drop rows that cannot be priced ---
+    df = df.dropna(subset=["wholesale_price"])
 
     # --- Normalize Season ---
     df["season_raw"] = (
@@ -49,15 +168,119 @@ def load_master_pricing(local_path: str) -> pd.DataFrame:
         .str.strip()
     )
 
-    # --- Normalize Price ---
-    df["wholesale_price"] = pd.to_numeric(
-        df["wholesale_price"],
-        errors="coerce"
-    )
+    return _apply_pricing_dtypes(df[PRICING_FRAME_COLUMNS])
 
-    # --- Drop rows that cannot be priced ---
-    df = df.dropna(subset=["wholesale_price"])
 
-    df = df.where(pd.notnull(df), None)
+def pricing_memory_report(df: "pd.DataFrame") -> dict:
+    """
+    Memory used by a pricing frame, in bytes: per column (including
+    the index) and in total. Object columns are measured deeply.
+    """
+
+    usage = df.memory_usage(deep=True)
+
+    return {
+        "rows": len(df),
+        "columns": {str(column): int(size) for column, size in usage.items()},
+        "total_bytes": int(usage.sum()),
+    }
+
+
+def explode_seasons(pricing_df: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    One row per (season label, variety): a variety listed for
+    "Early Spring, Late Spring" appears once under each season.
+    The `season` column is categorical.
+    """
+
+    df = pricing_df[["season_raw", "category", "wholesale_price"]].copy()
+
+    df["season"] = df["season_raw"].astype(str).str.split(",")
+    df = df.explode("season")
+    df["season"] = df["season"].str.strip()
+
+    df = df[df["season"] != ""]
+    df["season"] = df["season"].astype("category")
+
+    return df.drop(columns="season_raw")
+
+# -----------------------------
+# Price index
+# -----------------------------
+
+PRICE_STATS = ["mean", "median", "min", "max", "count"]
+
+
+class PriceIndex:
+    """
+    Wholesale price statistics per (season, category), computed once
+    from the Master Variety List.
+
+    A variety belongs to every season listed in its comma-separated
+    Season cell, so "Early Spring, Late Spring" counts towards both.
+    Seasons use the pricing labels ("Early Spring", "Summer/Fall", ...).
+    """
+
+    def __init__(self, stats: dict):
+        # {(season, category): {"mean": float, ..., "count": int}}
+        self._stats = stats
+
+        # {season: {category: mean}} for the common lookup
+        self._avg_prices: dict = {}
+        for (season, category), values in stats.items():
+            self._avg_prices.setdefault(season, {})[category] = values["mean"]
+
+    @classmethod
+    def from_frame(cls, pricing_df: "pd.DataFrame") -> "PriceIndex":
+        """
+        Build the index from a frame returned by `load_master_pricing`.
+        """
+
+        df = explode_seasons(pricing_df)
+        df["wholesale_price"] = df["wholesale_price"].astype(float)
+
+        grouped = (
+            df.groupby(["season", "category"], observed=True)["wholesale_price"]
+            .agg(PRICE_STATS)
+        )
+
+        stats = {
+            (season, category): {
+                "mean": float(row["mean"]),
+                "median": float(row["median"]),
+                "min": float(row["min"]),
+                "max": float(row["max"]),
+                "count": int(row["count"]),
+            }
+            for (season, category), row in grouped.iterrows()
+        }
+
+        return cls(stats)
+
+    def seasons(self) -> list:
+        return sorted(self._avg_prices)
+
+    def avg_prices(self, season_label: str) -> dict:
+        """
+        Return {category: mean wholesale price} for a pricing season.
+        Unknown seasons return an empty dict.
+        """
+
+        return dict(self._avg_prices.get(season_label, {}))
+
+    def stats(self, season_label: str, category: str) -> Optional[dict]:
+        """
+        Return mean/median/min/max/count for one (season, category),
+        or None if no priced variety matches.
+        """
+
+        values = self._stats.get((season_label, category))
+        return None if values is None else dict(values)
+
+
+def load_price_index(local_path: str = MASTER_PRICING_PATH) -> PriceIndex:
+    """
+    Load the Master Variety List and build its price index.
+    """
 
-    return df
\ No newline at end of file
+    return PriceIndex.from_frame(load_master_pricing(local_path))
@@ -1,8 +1,17 @@
 ### PHASE 3B ###
 
+import os
+import threading
 from pathlib import Path
 from typing import Dict
-import pandas as pd
+
+from core.instrumentation import traced
+from core.snapshots import (
+    file_digest,
+    read_snapshot,
+    snapshot_source_digest,
+    write_snapshot,
+)
 
 VALID_CATEGORIES = [
     "Focal",
@@ -19,11 +28,25 @@ SEASON_SHEETS = [
     "Summer-Fall",
 ]
 
+BOUNDS_PATH = Path(__file__).parent.parent / "data" / "BB_recipe_bounds.xlsx"
+
+
+RECIPE_BOUNDS_SNAPSHOT_KIND = "recipe_bounds"
+
 
-def load_recipe_bounds(path: Path) -> Dict[str, Dict[str, Dict[str, int]]]:
+@traced("load_recipe_bounds")
+def load_recipe_bounds(
+    path: Path,
+    use_snapshot: bool = True,
+    stats=None,
+) -> Dict[str, Dict[str, Dict[str, int]]]:
     """
     Load recipe bounds from the canonical Excel file.
 
+    If a fresh snapshot of the workbook exists it is used instead of
+    parsing Excel. Otherwise the workbook is parsed and a snapshot is
+    written for next time (best effort).
+
     Returns:
     {
         "Early Spring": {
@@ -39,6 +62,46 @@ def load_recipe_bounds(path: Path) -> Dict[str, Dict[str, Dict[str, int]]]:
     }
     """
 
+    if use_snapshot:
+        bounds = read_snapshot(path, RECIPE_BOUNDS_SNAPSHOT_KIND)
+        if bounds is not None:
+            if stats is not None:
+                stats.add("bounds_snapshot_loads")
+            return bounds
+
+    bounds = _read_recipe_bounds_excel(path)
+
+    if stats is not None:
+        stats.add("bounds_excel_parses")
+
+    if use_snapshot:
+        try:
+            write_snapshot(path, RECIPE_BOUNDS_SNAPSHOT_KIND, bounds)
+        except OSError:
+            # Read-only deployments simply keep parsing Excel
+            pass
+
+    return bounds
+
+
+def compile_recipe_bounds_snapshot(path: Path = BOUNDS_PATH) -> Path:
+    """
+    Parse the bounds workbook and (re)write its snapshot.
+    """
+
+    return write_snapshot(
+        path,
+        RECIPE_BOUNDS_SNAPSHOT_KIND,
+        _read_recipe_bounds_excel(path),
+    )
+
+
+def _read_recipe_bounds_excel(
+    path: Path,
+) -> Dict[str, Dict[str, Dict[str, int]]]:
+    # Only needed when the workbook has to be parsed
+    import pandas as pd
+
     bounds: Dict[str, Dict[str, Dict[str, int]]] = {}
 
     for season in SEASON_SHEETS:
@@ -100,3 +163,107 @@ def convert_bounds_to_percentages(
 
     return pct_bounds
 
+
+# -----------------------------
+# Cached bounds store
+# -----------------------------
+
+# Keyed by absolute file path. Each entry holds the file signature
+# (mtime, size), its content hash and the percentage bounds by season.
+_BOUNDS_CACHE: Dict[str, dict] = {}
+_BOUNDS_LOCK = threading.Lock()
+
+
+def _file_signature(path: Path) -> tuple:
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _load_bounds_entry(path: Path = BOUNDS_PATH, stats=None) -> dict:
+    """
+    Return the cache entry for `path`, (re)loading it when needed.
+
+    The file signature is checked on every call. When it changes, the
+    content hash decides whether the workbook really needs re-parsing
+    (e.g. a `touch` or a git checkout only updates the mtime).
+
+    If the workbook is missing, its snapshot is used as-is (signature
+    None) and the digest is the one recorded in the snapshot.
+    """
+
+    key = os.path.abspath(path)
+
+    try:
+        signature = _file_signature(path)
+    except FileNotFoundError:
+        signature = None
+
+    entry = _BOUNDS_CACHE.get(key)
+    if entry is not None and entry["signature"] == signature:
+        if stats is not None:
+            stats.add("bounds_cache_hits")
+        return entry
+
+    with _BOUNDS_LOCK:
+        entry = _BOUNDS_CACHE.get(key)
+        if entry is not None and entry["signature"] == signature:
+            return entry
+
+        if signature is None:
+            digest = snapshot_source_digest(path, RECIPE_BOUNDS_SNAPSHOT_KIND)
+
+            if digest is None:
+                raise FileNotFoundError(
+                    f"Recipe bounds workbook not found and no snapshot: {path}"
+                )
+        else:
+            digest = file_digest(path)
+
+        if entry is not None and entry["digest"] == digest:
+            entry["signature"] = signature
+            return entry
+
+        if stats is not None:
+            stats.add("bounds_cache_reloads")
+
+        raw_bounds = load_recipe_bounds(path, stats=stats)
+
+        entry = {
+            "signature": signature,
+            "digest": digest,
+            "pct_bounds": convert_bounds_to_percentages(raw_bounds),
+        }
+        _BOUNDS_CACHE[key] = entry
+
+    return entry
+
+
+def get_percentage_bounds(
+    path: Path = BOUNDS_PATH,
+    stats=None,
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """
+    Return percentage bounds keyed by season, loading the workbook
+    only the first time and whenever its contents change.
+
+    The returned dict is shared between callers and must not be mutated.
+    """
+
+    return _load_bounds_entry(path, stats)["pct_bounds"]
+
+
+def get_bounds_version(path: Path = BOUNDS_PATH) -> str:
+    """
+    Return the content hash of the bounds workbook currently in use.
+    """
+
+    return _load_bounds_entry(path)["digest"]
+
+
+def clear_bounds_cache() -> None:
+    """
+    Drop all cached bounds. The next access re-reads the workbook.
+    """
+
+    with _BOUNDS_LOCK:
+        _BOUNDS_CACHE.clear()
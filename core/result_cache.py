@@ -0,0 +1,265 @@
+"""
+Memoized optimize_bouquets.
+
+Results are keyed by a canonical hash of the inputs (season, target
+price, availability and prices in sorted order, search options), the
+content hash of the bounds workbook and a hash of the optimizer's own
+source, so editing either invalidates old entries.
+
+Entries live in a bounded in-memory LRU. If a cache directory is
+configured (argument or the BB_CACHE_DIR environment variable),
+results are also stored in a SQLite file there and survive restarts.
+"""
+
+import copy
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.optimization import optimize_bouquets
+from core.recipe_bounds import get_bounds_version
+
+DEFAULT_MAX_ENTRIES = 256
+
+CACHE_DIR_ENV = "BB_CACHE_DIR"
+CACHE_DB_NAME = "optimize_results.sqlite"
+
+# Returned by get() on a cache miss, so a miss can be told apart from
+# a cached None ("no feasible configuration") result
+_MISSING = object()
+
+_CODE_VERSION: Optional[str] = None
+
+
+def code_version() -> str:
+    """
+    Hash of the core package sources, computed once per process.
+    """
+
+    global _CODE_VERSION
+
+    if _CODE_VERSION is None:
+        digest = hashlib.sha256()
+        for path in sorted(Path(__file__).parent.glob("*.py")):
+            digest.update(path.name.encode())
+            digest.update(path.read_bytes())
+        _CODE_VERSION = digest.hexdigest()
+
+    return _CODE_VERSION
+
+
+def canonical_key(
+    available_stems: Dict[str, int],
+    season_key: str,
+    target_price: float,
+    avg_wholesale_prices: Dict[str, float],
+    bounds_version: str,
+    options: Optional[dict] = None,
+) -> str:
+    """
+    Stable hash of one optimize_bouquets call.
+
+    Dict inputs are sorted, and numbers are normalized so that
+    e.g. a target price of 25 and 25.0 share an entry.
+    """
+
+    payload = {
+        "available_stems": sorted(
+            (category, int(stems)) for category, stems in available_stems.items()
+        ),
+        "season_key": season_key,
+        "target_price": float(target_price),
+        "avg_wholesale_prices": sorted(
+            (category, float(price))
+            for category, price in avg_wholesale_prices.items()
+        ),
+        "bounds_version": bounds_version,
+        "code_version": code_version(),
+        "options": sorted((options or {}).items()),
+    }
+
+    encoded = json.dumps(payload, separators=(",", ":"), sort_keys=True)
+
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class ResultCache:
+    """
+    LRU cache of optimize_bouquets results with an optional SQLite tier.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = DEFAULT_MAX_ENTRIES,
+        cache_dir: Optional[Path] = None,
+    ):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self._db = None
+        if cache_dir is not None:
+            cache_dir = Path(cache_dir)
+            cache_dir.mkdir(parents=True, exist_ok=True)
+
+            self._db = sqlite3.connect(
+                str(cache_dir / CACHE_DB_NAME),
+                check_same_thread=False,
+            )
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+            )
+            self._db.commit()
+
+    def get(self, key: str):
+        """
+        Return the cached result, or _MISSING.
+        """
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value FROM results WHERE key = ?", (key,)
+                ).fetchone()
+
+                if row is not None:
+                    result = json.loads(row[0])
+                    self._remember(key, result)
+                    self.disk_hits += 1
+                    return result
+
+            self.misses += 1
+            return _MISSING
+
+    def put(self, key: str, result) -> None:
+        with self._lock:
+            self._remember(key, result)
+
+            if self._db is not None:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, created) "
+                    "VALUES (?, ?, ?)",
+                    (key, json.dumps(result), time.time()),
+                )
+                self._db.commit()
+
+    def _remember(self, key: str, result) -> None:
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+            if self._db is not None:
+                self._db.execute("DELETE FROM results")
+                self._db.commit()
+
+    def stats(self) -> dict:
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "disk": self._db is not None,
+        }
+
+
+_DEFAULT_CACHE: Optional[ResultCache] = None
+_DEFAULT_CACHE_LOCK = threading.Lock()
+
+
+def get_default_cache() -> ResultCache:
+    """
+    Process-wide cache. Uses a SQLite tier if BB_CACHE_DIR is set.
+    """
+
+    global _DEFAULT_CACHE
+
+    with _DEFAULT_CACHE_LOCK:
+        if _DEFAULT_CACHE is None:
+            cache_dir = os.environ.get(CACHE_DIR_ENV)
+            _DEFAULT_CACHE = ResultCache(
+                cache_dir=Path(cache_dir) if cache_dir else None,
+            )
+
+    return _DEFAULT_CACHE
+
+
+def cached_optimize_bouquets(
+    available_stems: Dict[str, int],
+    season_key: str,
+    target_price: float,
+    avg_wholesale_prices: Dict[str, float],
+    cache: Optional[ResultCache] = None,
+    **options,
+) -> Optional[Dict]:
+    """
+    optimize_bouquets with memoization.
+
+    Extra keyword arguments are passed through to optimize_bouquets and
+    are part of the cache key, except `progress`, which is only used
+    when the optimizer actually runs. Runs that collect `stats` always
+    execute, since their point is to measure a real run.
+
+    Callers get their own copy of the result and may modify it.
+    """
+
+    if options.get("stats") is not None:
+        return optimize_bouquets(
+            available_stems=available_stems,
+            season_key=season_key,
+            target_price=target_price,
+            avg_wholesale_prices=avg_wholesale_prices,
+            **options,
+        )
+
+    options.pop("stats", None)
+    progress = options.pop("progress", None)
+
+    if cache is None:
+        cache = get_default_cache()
+
+    key = canonical_key(
+        available_stems=available_stems,
+        season_key=season_key,
+        target_price=target_price,
+        avg_wholesale_prices=avg_wholesale_prices,
+        bounds_version=get_bounds_version(),
+        options=options,
+    )
+
+    result = cache.get(key)
+
+    if result is _MISSING:
+        result = optimize_bouquets(
+            available_stems=available_stems,
+            season_key=season_key,
+            target_price=target_price,
+            avg_wholesale_prices=avg_wholesale_prices,
+            progress=progress,
+            **options,
+        )
+        cache.put(key, result)
+
+    return copy.deepcopy(result)
@@ -0,0 +1,133 @@
+"""
+Run many optimize_bouquets scenarios across worker processes.
+
+optimize_bouquets is CPU-bound pure Python, so a batch of scenarios
+(several seasons, price points and inventory variants) is spread over
+a ProcessPoolExecutor. Each worker loads the recipe bounds and the
+pricing index once, in its initializer, and reuses them for every job
+it runs.
+
+A job is a tuple:
+
+    (available_stems, season_key, target_price, prices)
+
+where `prices` is the avg wholesale price per category. If it is None,
+the worker looks the season's averages up in the Master Variety List.
+
+    for index, result in iter_scenarios(jobs):
+        ...                          # results as they complete
+
+    results = run_scenarios(jobs)    # results in job order
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from core.canonical_recipes import SEASON_KEY_TO_PRICING_LABEL
+from core.optimization import optimize_bouquets
+from core.pricing_data import load_price_index
+from core.recipe_bounds import get_percentage_bounds
+
+# Set in each worker by _init_worker
+_PRICE_INDEX = None
+_SEARCH_MODE = "best_first"
+
+
+def _init_worker(search_mode: str) -> None:
+    """
+    Pool initializer: warm the bounds cache and load pricing once.
+    """
+
+    global _PRICE_INDEX, _SEARCH_MODE
+
+    get_percentage_bounds()
+    _PRICE_INDEX = load_price_index()
+    _SEARCH_MODE = search_mode
+
+
+def _run_job(index: int, job: Tuple) -> Tuple[int, Optional[Dict]]:
+    available_stems, season_key, target_price, prices = job
+
+    if prices is None:
+        prices = _PRICE_INDEX.avg_prices(SEASON_KEY_TO_PRICING_LABEL[season_key])
+
+    result = optimize_bouquets(
+        available_stems=available_stems,
+        season_key=season_key,
+        target_price=target_price,
+        avg_wholesale_prices=prices,
+        search_mode=_SEARCH_MODE,
+    )
+
+    return index, result
+
+
+def iter_scenarios(
+    jobs: Sequence[Tuple],
+    max_workers: Optional[int] = None,
+    search_mode: str = "best_first",
+) -> Iterator[Tuple[int, Optional[Dict]]]:
+    """
+    Run `jobs` in a process pool and yield (job index, result) pairs
+    in completion order.
+
+    A job that raises re-raises here when its result is reached;
+    the remaining jobs are cancelled when the generator is closed.
+    """
+
+    jobs = list(jobs)
+
+    if not jobs:
+        return
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+
+    max_workers = min(max_workers, len(jobs))
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(search_mode,),
+    ) as executor:
+        futures = [
+            executor.submit(_run_job, index, job)
+            for index, job in enumerate(jobs)
+        ]
+
+        try:
+            for future in as_completed(futures):
+                yield future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+
+
+def run_scenarios(
+    jobs: Sequence[Tuple],
+    max_workers: Optional[int] = None,
+    search_mode: str = "best_first",
+    on_result: Optional[Callable[[int, Optional[Dict]], None]] = None,
+) -> List[Optional[Dict]]:
+    """
+    Run `jobs` in a process pool and return their results in job order.
+
+    `on_result(index, result)` is called for each job as soon as it
+    completes, e.g. to report progress.
+    """
+
+    jobs = list(jobs)
+    results: List[Optional[Dict]] = [None] * len(jobs)
+
+    for index, result in iter_scenarios(
+        jobs,
+        max_workers=max_workers,
+        search_mode=search_mode,
+    ):
+        results[index] = result
+
+        if on_result is not None:
+            on_result(index, result)
+
+    return results
@@ -0,0 +1,518 @@
+"""
+Local HTTP service for the optimizer and pricing calculations.
+
+A plain WSGI application (no framework) with these endpoints:
+
+    GET  /health           service status
+    POST /optimize         one optimize_bouquets run
+    POST /optimize/batch   several runs, results in request order
+    POST /price            stem recipe and break-even price for a bouquet
+
+Request and response bodies are JSON. Recipe bounds and the price
+index are loaded once when the service is created. Optimizer runs go
+to a process pool of `workers` warm processes (each has loaded the
+bounds in its initializer); with workers=0 they run in the request
+thread. Every response carries an X-Compute-Time-Ms header.
+
+Invalid input, including client-supplied wholesale prices, is a 400.
+In a batch, a job that is invalid or fails gets {"error": ...} in its
+slot and the other jobs still run.
+
+Run it with:
+
+    python -m core.service --port 8000 --workers 4
+
+Tests can call the application directly through TestClient.
+"""
+
+import argparse
+import io
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from socketserver import ThreadingMixIn
+from typing import Dict, Optional
+from wsgiref.simple_server import WSGIServer, make_server
+from wsgiref.util import setup_testing_defaults
+
+from core.canonical_recipes import CANONICAL_RECIPES, SEASON_KEY_TO_PRICING_LABEL
+from core.optimization import SEARCH_MODES, optimize_bouquets
+from core.pricing_data import load_price_index
+from core.recipe_bounds import VALID_CATEGORIES, get_bounds_version, get_percentage_bounds
+from core.stem_scaling import calculate_stem_recipe
+
+# Largest request body accepted, in bytes
+MAX_BODY_BYTES = 1_000_000
+
+# Largest number of jobs in one /optimize/batch request
+MAX_BATCH_JOBS = 500
+
+# Defaults of the pricing tool's assumption sliders
+DEFAULT_GEF = 1.0
+DEFAULT_LABOR_MINUTES = 3
+DEFAULT_LABOR_RATE_PER_HOUR = 17.0
+DEFAULT_MATERIALS_COST = 0.30
+
+STATUS_TEXT = {
+    200: "200 OK",
+    400: "400 Bad Request",
+    404: "404 Not Found",
+    405: "405 Method Not Allowed",
+    413: "413 Payload Too Large",
+    500: "500 Internal Server Error",
+}
+
+
+class RequestError(Exception):
+    """
+    Invalid request; reported to the client with `status`.
+    """
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class OptimizerService:
+    """
+    WSGI application. Create one per process and reuse it.
+    """
+
+    def __init__(self, workers: Optional[int] = None, price_index=None):
+        if workers is None:
+            workers = os.cpu_count() or 1
+
+        get_percentage_bounds()
+        self.price_index = price_index or load_price_index()
+        self.started = time.time()
+
+        self.workers = workers
+        self.executor = None
+
+        if workers > 0:
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=get_percentage_bounds,
+            )
+
+        self.routes = {
+            "/health": ("GET", self.health),
+            "/optimize": ("POST", self.optimize),
+            "/optimize/batch": ("POST", self.optimize_batch),
+            "/price": ("POST", self.price),
+        }
+
+    def close(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
+
+    # -----------------------------
+    # WSGI
+    # -----------------------------
+
+    def __call__(self, environ, start_response):
+        start = time.perf_counter()
+
+        try:
+            status, body = self.dispatch(environ)
+        except RequestError as e:
+            status, body = e.status, {"error": str(e)}
+        except Exception as e:
+            status, body = 500, {"error": f"Internal error: {type(e).__name__}"}
+
+        payload = json.dumps(body).encode()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        start_response(STATUS_TEXT[status], [
+            ("Content-Type", "application/json"),
+            ("Content-Length", str(len(payload))),
+            ("X-Compute-Time-Ms", f"{elapsed_ms:.2f}"),
+        ])
+
+        return [payload]
+
+    def dispatch(self, environ) -> tuple:
+        path = environ.get("PATH_INFO", "/").rstrip("/") or "/"
+        method = environ.get("REQUEST_METHOD", "GET")
+
+        if path not in self.routes:
+            raise RequestError(f"No endpoint {path}", status=404)
+
+        allowed, handler = self.routes[path]
+
+        if method != allowed:
+            raise RequestError(f"{path} only accepts {allowed}", status=405)
+
+        if method == "POST":
+            return 200, handler(read_json_body(environ))
+
+        return 200, handler()
+
+    # -----------------------------
+    # Endpoints
+    # -----------------------------
+
+    def health(self) -> Dict:
+        return {
+            "status": "ok",
+            "workers": self.workers,
+            "bounds_version": get_bounds_version(),
+            "uptime_s": round(time.time() - self.started, 1),
+        }
+
+    def optimize(self, body: Dict) -> Dict:
+        kwargs = self.optimize_kwargs(body)
+
+        # optimize_bouquets raises ValueError for inputs it rejects
+        try:
+            if self.executor is None:
+                result = optimize_bouquets(**kwargs)
+            else:
+                result = self.executor.submit(optimize_bouquets, **kwargs).result()
+        except ValueError as e:
+            raise RequestError(str(e))
+
+        return result_or_error(result)
+
+    def optimize_batch(self, body: Dict) -> Dict:
+        jobs = body.get("jobs") if isinstance(body, dict) else None
+
+        if not isinstance(jobs, list):
+            raise RequestError("Expected a 'jobs' list.")
+
+        if len(jobs) > MAX_BATCH_JOBS:
+            raise RequestError(
+                f"At most {MAX_BATCH_JOBS} jobs per batch.", status=413
+            )
+
+        # A job that is invalid or fails gets its own {"error": ...};
+        # the other jobs still run
+        results = [None] * len(jobs)
+        futures = {}
+
+        for i, job in enumerate(jobs):
+            try:
+                kwargs = self.optimize_kwargs(job)
+            except RequestError as e:
+                results[i] = {"error": str(e)}
+                continue
+
+            if self.executor is None:
+                results[i] = job_result(lambda: optimize_bouquets(**kwargs))
+            else:
+                futures[i] = self.executor.submit(optimize_bouquets, **kwargs)
+
+        for i, future in futures.items():
+            results[i] = job_result(future.result)
+
+        return {"results": results}
+
+    def price(self, body: Dict) -> Dict:
+        """
+        Same calculation as the pricing tool: canonical recipe for
+        `total_stems`, valued at the season's average wholesale prices,
+        adjusted by the growing efficiency factor (gef), plus labor and
+        materials.
+        """
+
+        season_key = require_season(body)
+
+        try:
+            total_stems = int(body["total_stems"])
+            gef = float(body.get("gef", DEFAULT_GEF))
+            labor_minutes = float(body.get("labor_minutes", DEFAULT_LABOR_MINUTES))
+            labor_rate = float(
+                body.get("labor_rate_per_hour", DEFAULT_LABOR_RATE_PER_HOUR)
+            )
+            materials_cost = float(body.get("materials_cost", DEFAULT_MATERIALS_COST))
+        except KeyError as e:
+            raise RequestError(f"Missing field {e}")
+        except (TypeError, ValueError) as e:
+            raise RequestError(f"Invalid value: {e}")
+
+        if total_stems <= 0:
+            raise RequestError("total_stems must be positive.")
+
+        recipe_counts = calculate_stem_recipe(
+            total_stems=total_stems,
+            recipe_percentages=CANONICAL_RECIPES[season_key],
+        )
+
+        avg_prices = self.price_index.avg_prices(
+            SEASON_KEY_TO_PRICING_LABEL[season_key]
+        )
+
+        estimated_wholesale_value = sum(
+            recipe_counts.get(category, 0) * avg_prices.get(category, 0)
+            for category in recipe_counts
+        )
+        estimated_florals_cost = estimated_wholesale_value * gef
+        labor_cost = (labor_minutes / 60) * labor_rate
+
+        break_even_price = round(
+            estimated_florals_cost + labor_cost + materials_cost, 1
+        )
+
+        return {
+            "season_key": season_key,
+            "total_stems": total_stems,
+            "recipe": recipe_counts,
+            "estimated_wholesale_value": round(estimated_wholesale_value, 2),
+            "estimated_florals_cost": round(estimated_florals_cost, 2),
+            "labor_cost": round(labor_cost, 2),
+            "materials_cost": round(materials_cost, 2),
+            "break_even_price": break_even_price,
+        }
+
+    # -----------------------------
+    # Request parsing
+    # -----------------------------
+
+    def optimize_kwargs(self, body: Dict) -> Dict:
+        """
+        optimize_bouquets keyword arguments for one request body.
+        """
+
+        season_key = require_season(body)
+
+        try:
+            target_price = float(body["target_price"])
+            stems = body["available_stems"]
+        except KeyError as e:
+            raise RequestError(f"Missing field {e}")
+        except (TypeError, ValueError) as e:
+            raise RequestError(f"Invalid value: {e}")
+
+        if not math.isfinite(target_price) or target_price <= 0:
+            raise RequestError("target_price must be a positive number.")
+
+        available_stems = require_stems(stems)
+
+        search_mode = body.get("search_mode", SEARCH_MODES[0])
+        if search_mode not in SEARCH_MODES:
+            raise RequestError(f"Unknown search mode '{search_mode}'.")
+
+        prices = body.get("avg_wholesale_prices")
+        if prices is None:
+            prices = self.price_index.avg_prices(
+                SEASON_KEY_TO_PRICING_LABEL[season_key]
+            )
+        else:
+            prices = require_prices(prices)
+
+        return {
+            "available_stems": available_stems,
+            "season_key": season_key,
+            "target_price": target_price,
+            "avg_wholesale_prices": prices,
+            "search_mode": search_mode,
+        }
+
+
+def require_season(body: Dict) -> str:
+    if not isinstance(body, dict):
+        raise RequestError("Expected a JSON object.")
+
+    season_key = body.get("season_key")
+
+    if season_key not in SEASON_KEY_TO_PRICING_LABEL:
+        raise RequestError(
+            f"season_key must be one of: {', '.join(SEASON_KEY_TO_PRICING_LABEL)}"
+        )
+
+    return season_key
+
+
+def require_stems(stems) -> Dict[str, int]:
+    """
+    Client-supplied available_stems: a whole, non-negative number of
+    stems per category (missing categories have none).
+    """
+
+    if not isinstance(stems, dict):
+        raise RequestError("available_stems must be an object.")
+
+    checked = {}
+
+    for category in VALID_CATEGORIES:
+        value = stems.get(category, 0)
+
+        if isinstance(value, float) and value.is_integer():
+            value = int(value)
+
+        if isinstance(value, bool) or not isinstance(value, int) or value < 0:
+            raise RequestError(
+                f"Invalid stem count for {category}: {value!r}"
+            )
+
+        checked[category] = value
+
+    return checked
+
+
+def require_prices(prices) -> Dict[str, float]:
+    """
+    Client-supplied avg_wholesale_prices: a non-negative number for
+    every category.
+    """
+
+    if not isinstance(prices, dict):
+        raise RequestError("avg_wholesale_prices must be an object.")
+
+    missing = [c for c in VALID_CATEGORIES if c not in prices]
+    if missing:
+        raise RequestError(
+            f"avg_wholesale_prices is missing: {', '.join(missing)}"
+        )
+
+    checked = {}
+
+    for category, value in prices.items():
+        if (
+            isinstance(value, bool)
+            or not isinstance(value, (int, float))
+            or not math.isfinite(value)
+            or value < 0
+        ):
+            raise RequestError(
+                f"Invalid wholesale price for {category}: {value!r}"
+            )
+
+        checked[category] = float(value)
+
+    return checked
+
+
+def result_or_error(result: Optional[Dict]) -> Dict:
+    if result is None:
+        return {"error": "No feasible bouquet configuration at this price."}
+
+    return result
+
+
+def job_result(run) -> Dict:
+    """
+    result_or_error(run()) for one batch job, with an exception
+    reported as that job's error.
+    """
+
+    try:
+        return result_or_error(run())
+    except ValueError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        return {"error": f"Internal error: {type(e).__name__}"}
+
+
+def read_json_body(environ) -> Dict:
+    try:
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+    except ValueError:
+        raise RequestError("Invalid Content-Length.")
+
+    if length > MAX_BODY_BYTES:
+        raise RequestError("Request body too large.", status=413)
+
+    raw = environ["wsgi.input"].read(length) if length else b""
+
+    try:
+        return json.loads(raw or b"{}")
+    except ValueError:
+        raise RequestError("Request body is not valid JSON.")
+
+
+# -----------------------------
+# In-process client
+# -----------------------------
+
+class TestClient:
+    """
+    Calls a WSGI application directly, without a socket.
+
+        client = TestClient(OptimizerService(workers=0))
+        response = client.post("/optimize", {...})
+        response.status, response.headers, response.json()
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def get(self, path: str) -> "TestResponse":
+        return self.request("GET", path)
+
+    def post(self, path: str, body=None) -> "TestResponse":
+        return self.request("POST", path, json.dumps(body).encode())
+
+    def request(self, method: str, path: str, data: bytes = b"") -> "TestResponse":
+        environ = {
+            "REQUEST_METHOD": method,
+            "PATH_INFO": path,
+            "CONTENT_TYPE": "application/json",
+            "CONTENT_LENGTH": str(len(data)),
+            "wsgi.input": io.BytesIO(data),
+        }
+        setup_testing_defaults(environ)
+
+        captured = {}
+
+        def start_response(status, headers):
+            captured["status"] = int(status.split()[0])
+            captured["headers"] = dict(headers)
+
+        body = b"".join(self.app(environ, start_response))
+
+        return TestResponse(captured["status"], captured["headers"], body)
+
+
+class TestResponse:
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes):
+        self.status = status
+        self.headers = headers
+        self.body = body
+
+    def json(self):
+        return json.loads(self.body)
+
+
+# -----------------------------
+# Server
+# -----------------------------
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+def serve(host: str = "127.0.0.1", port: int = 8000, workers: Optional[int] = None) -> None:
+    app = OptimizerService(workers=workers)
+
+    with make_server(host, port, app, server_class=ThreadingWSGIServer) as server:
+        print(f"Serving on http://{host}:{port} with {app.workers} workers")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            app.close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Bouquet Blueprint optimizer service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        help="optimizer processes (default: CPU count; 0 runs in-thread)",
+    )
+    args = parser.parse_args(argv)
+
+    serve(host=args.host, port=args.port, workers=args.workers)
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,205 @@
+"""
+Compiled snapshots of the workbooks in data/.
+
+Parsing .xlsx files with pandas/openpyxl is the slowest part of app
+start-up. A snapshot stores the already-parsed contents of a workbook
+next to it (`<workbook>.snapshot`) together with the source file's
+size, mtime and content hash, so loaders can skip Excel entirely while
+the workbook is unchanged.
+
+Compile all snapshots with:
+
+    python -m core.snapshots
+"""
+
+import hashlib
+import os
+import pickle
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+# Bump whenever the payload layout of any snapshot kind changes.
+SNAPSHOT_FORMAT_VERSION = 2
+
+SNAPSHOT_SUFFIX = ".snapshot"
+
+DATA_DIR = Path(__file__).parent.parent / "data"
+
+
+def file_digest(path: Path) -> str:
+    """
+    Return the sha256 hex digest of a file's contents.
+    """
+
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def snapshot_path_for(source_path: Path) -> Path:
+    source_path = Path(source_path)
+    return source_path.with_name(source_path.name + SNAPSHOT_SUFFIX)
+
+
+def write_snapshot(source_path: Path, kind: str, payload: Any) -> Path:
+    """
+    Write `payload` as the snapshot of `source_path`.
+
+    The file is written to a uniquely named temporary file next to it
+    and then moved into place, so readers never see a half-written
+    snapshot and concurrent writers (e.g. scenario-runner or service
+    workers rebuilding at once) never share a file; the last move wins.
+    """
+
+    source_path = Path(source_path)
+    stat = os.stat(source_path)
+
+    record = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "kind": kind,
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "source_sha256": file_digest(source_path),
+        "payload": payload,
+    }
+
+    snapshot_path = snapshot_path_for(source_path)
+
+    with tempfile.NamedTemporaryFile(
+        dir=snapshot_path.parent,
+        prefix=snapshot_path.name + ".",
+        suffix=".tmp",
+        delete=False,
+    ) as f:
+        tmp_path = f.name
+
+        try:
+            pickle.dump(record, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except BaseException:
+            f.close()
+            os.unlink(tmp_path)
+            raise
+
+    try:
+        # NamedTemporaryFile creates the file owner-only
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, snapshot_path)
+    except OSError:
+        os.unlink(tmp_path)
+        raise
+
+    return snapshot_path
+
+
+def read_snapshot(source_path: Path, kind: str) -> Optional[Any]:
+    """
+    Return the snapshot payload for `source_path`, or None if there is
+    no usable snapshot.
+
+    A snapshot is used when:
+    - it was written by this format version for the same kind, and
+    - the source has the recorded size/mtime, or (if those changed)
+      still has the recorded content hash.
+
+    If the source workbook is missing, the snapshot is used as-is. A
+    snapshot that cannot be unpickled (truncated, corrupt, or naming
+    classes that no longer exist) counts as missing, so the caller
+    rebuilds it.
+    """
+
+    record = _read_record(source_path, kind)
+
+    if record is None:
+        return None
+
+    try:
+        stat = os.stat(source_path)
+    except FileNotFoundError:
+        return record["payload"]
+
+    if (
+        stat.st_size == record.get("source_size")
+        and stat.st_mtime_ns == record.get("source_mtime_ns")
+    ):
+        return record["payload"]
+
+    # Source was touched (or checked out again); only the contents matter
+    if file_digest(source_path) == record.get("source_sha256"):
+        return record["payload"]
+
+    return None
+
+
+def snapshot_source_digest(source_path: Path, kind: str) -> Optional[str]:
+    """
+    Content hash of the workbook a `kind` snapshot of `source_path` was
+    compiled from, or None if there is no readable snapshot. Lets
+    loaders version data whose workbook is not deployed.
+    """
+
+    record = _read_record(source_path, kind)
+
+    if record is None:
+        return None
+
+    return record.get("source_sha256")
+
+
+def _read_record(source_path: Path, kind: str) -> Optional[dict]:
+    """
+    The snapshot record of `source_path` if it unpickles and has this
+    format version and `kind`, else None.
+    """
+
+    snapshot_path = snapshot_path_for(source_path)
+
+    try:
+        with open(snapshot_path, "rb") as f:
+            record = pickle.load(f)
+    except (
+        OSError,
+        EOFError,
+        pickle.UnpicklingError,
+        AttributeError,
+        ImportError,
+        IndexError,
+        KeyError,
+        TypeError,
+        ValueError,
+    ):
+        return None
+
+    if not isinstance(record, dict):
+        return None
+
+    if record.get("format_version") != SNAPSHOT_FORMAT_VERSION:
+        return None
+
+    if record.get("kind") != kind:
+        return None
+
+    return record
+
+
+def compile_snapshots(data_dir: Path = DATA_DIR) -> list:
+    """
+    Parse every workbook in `data_dir` that has a loader and write its
+    snapshot. Returns the list of snapshot paths written.
+    """
+
+    from core.recipe_bounds import compile_recipe_bounds_snapshot
+    from core.pricing_data import compile_master_pricing_snapshot
+
+    data_dir = Path(data_dir)
+
+    return [
+        compile_recipe_bounds_snapshot(data_dir / "BB_recipe_bounds.xlsx"),
+        compile_master_pricing_snapshot(
+            data_dir / "CANONICAL Bouquet Recipe Master Sheet.xlsx"
+        ),
+    ]
+
+
+if __name__ == "__main__":
+    for path in compile_snapshots():
+        print(f"Wrote {path}")
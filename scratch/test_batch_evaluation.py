@@ -0,0 +1,42 @@
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from core.batch_evaluation import evaluate_batch
+from core.compensation import evaluate_allocation
+
+categories = ["Focal", "Foundation", "Filler", "Floater", "Finisher", "Foliage"]
+
+allocations = [
+    {"Focal": 3, "Foundation": 3, "Filler": 0, "Floater": 2, "Finisher": 1, "Foliage": 2},
+    {"Focal": 2, "Foundation": 4, "Filler": 1, "Floater": 1, "Finisher": 1, "Foliage": 1},
+    {"Focal": 1, "Foundation": 2, "Filler": 0, "Floater": 0, "Finisher": 0, "Foliage": 3},
+]
+
+available_stems = {
+    "Focal": 30,
+    "Foundation": 100,
+    "Filler": 0,
+    "Floater": 20,
+    "Finisher": 50,
+    "Foliage": 10,
+}
+
+batch = evaluate_batch(
+    [[a[c] for c in categories] for a in allocations],
+    [available_stems[c] for c in categories],
+)
+
+print("Batch evaluation:")
+for row, allocation in enumerate(allocations):
+    single = evaluate_allocation(allocation, available_stems)
+    limiting = categories[batch["limiting_index"][row]]
+
+    print(
+        f"row {row}: max_bouquets={batch['max_bouquets'][row]} "
+        f"limiting={limiting} "
+        f"stranded={batch['stranded_stems'][row].tolist()} "
+        f"(single: {single['max_bouquets']}, {single['limiting_category']})"
+    )
@@ -0,0 +1,82 @@
+import sys
+import time
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from core.compensation import (
+    search_best_allocation,
+    search_best_first,
+)
+from core.recipe_bounds import get_percentage_bounds
+from core.bouquet_sizing import apply_percentage_bounds
+from core.optimization import (
+    COMPENSATION_RULES,
+    WASTE_WEIGHTS,
+    build_tier_a_allocation,
+    waste_penalty,
+)
+
+# -----------------------------
+# Setup
+# -----------------------------
+
+season = "Early Spring"
+implied_stems_per_bouquet = 15.0
+
+available_stems = {
+    "Foundation": 100,
+    "Focal": 30,
+    "Filler": 0,
+    "Floater": 20,
+    "Finisher": 50,
+    "Foliage": 10,
+}
+
+pct_bounds = get_percentage_bounds()
+
+stem_bounds = apply_percentage_bounds(
+    total_stems=implied_stems_per_bouquet,
+    pct_bounds_for_season=pct_bounds[season],
+)
+
+initial = build_tier_a_allocation(
+    implied_stems_per_bouquet=implied_stems_per_bouquet,
+    pct_bounds_for_season=pct_bounds[season],
+)
+
+print("Initial allocation:", initial)
+
+# -----------------------------
+# Lookahead with compensation vs best-first
+# -----------------------------
+
+start = time.perf_counter()
+lookahead = search_best_allocation(
+    initial_allocation=initial,
+    available_stems=available_stems,
+    stem_bounds=stem_bounds,
+    compensation_rules=COMPENSATION_RULES,
+    waste_weights=WASTE_WEIGHTS,
+)
+lookahead_ms = (time.perf_counter() - start) * 1000
+
+start = time.perf_counter()
+best_first = search_best_first(
+    initial_allocation=initial,
+    available_stems=available_stems,
+    stem_bounds=stem_bounds,
+    compensation_rules=COMPENSATION_RULES,
+    waste_weights=WASTE_WEIGHTS,
+)
+best_first_ms = (time.perf_counter() - start) * 1000
+
+for name, result, ms in (
+    ("Lookahead", lookahead, lookahead_ms),
+    ("Best-first", best_first, best_first_ms),
+):
+    print(f"\n{name}:", result["allocation"])
+    print("Max bouquets:", result["evaluation"]["max_bouquets"])
+    print("Waste penalty:", waste_penalty(result["evaluation"]["stranded_stems"]))
+    print("Nodes expanded:", result["nodes_expanded"], f"({ms:.1f} ms)")
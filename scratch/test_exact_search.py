@@ -0,0 +1,67 @@
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from core.compensation import (
+    search_best_allocation,
+    search_max_bouquets_exact,
+)
+from core.recipe_bounds import get_percentage_bounds
+from core.bouquet_sizing import apply_percentage_bounds
+from core.optimization import build_tier_a_allocation
+
+# -----------------------------
+# Setup
+# -----------------------------
+
+season = "Early Spring"
+implied_stems_per_bouquet = 15.0
+
+available_stems = {
+    "Foundation": 100,
+    "Focal": 30,
+    "Filler": 0,
+    "Floater": 20,
+    "Finisher": 50,
+    "Foliage": 10,
+}
+
+pct_bounds = get_percentage_bounds()
+
+stem_bounds = apply_percentage_bounds(
+    total_stems=implied_stems_per_bouquet,
+    pct_bounds_for_season=pct_bounds[season],
+)
+
+initial = build_tier_a_allocation(
+    implied_stems_per_bouquet=implied_stems_per_bouquet,
+    pct_bounds_for_season=pct_bounds[season],
+)
+
+print("Initial allocation:", initial)
+
+# -----------------------------
+# Compare search modes
+# -----------------------------
+
+lookahead = search_best_allocation(
+    initial_allocation=initial,
+    available_stems=available_stems,
+    stem_bounds=stem_bounds,
+    compensation_rules={},
+)
+
+exact = search_max_bouquets_exact(
+    initial_allocation=initial,
+    available_stems=available_stems,
+    stem_bounds=stem_bounds,
+    compensation_rules={},
+)
+
+print("\nLookahead:", lookahead["allocation"])
+print("Max bouquets:", lookahead["evaluation"]["max_bouquets"])
+
+print("\nExact:", exact["allocation"])
+print("Max bouquets:", exact["evaluation"]["max_bouquets"])
@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+sys.path.append(str(ROOT_DIR))
+
+from core.service import OptimizerService, TestClient
+
+app = OptimizerService(workers=0)
+client = TestClient(app)
+
+inventory = {
+    "Focal": 80,
+    "Foundation": 300,
+    "Filler": 40,
+    "Floater": 20,
+    "Finisher": 50,
+    "Foliage": 60,
+}
+
+requests = [
+    ("GET", "/health", None),
+    ("POST", "/optimize", {
+        "season_key": "early_spring",
+        "target_price": 25,
+        "available_stems": inventory,
+    }),
+    ("POST", "/optimize/batch", {"jobs": [
+        {"season_key": "early_spring", "target_price": price, "available_stems": inventory}
+        for price in (25, 40, 60)
+    ]}),
+    ("POST", "/price", {"season_key": "summer_fall", "total_stems": 15}),
+    ("POST", "/optimize", [1, 2, 3]),
+    # Prices missing a category: 400, and only that batch job fails
+    ("POST", "/optimize", {
+        "season_key": "early_spring",
+        "target_price": 25,
+        "available_stems": inventory,
+        "avg_wholesale_prices": {"Focal": 2.5},
+    }),
+    ("POST", "/optimize/batch", {"jobs": [
+        {"season_key": "early_spring", "target_price": 25, "available_stems": inventory},
+        {
+            "season_key": "early_spring",
+            "target_price": 25,
+            "available_stems": inventory,
+            "avg_wholesale_prices": {c: "cheap" for c in inventory},
+        },
+    ]}),
+    # Each of these is a 400
+    ("POST", "/optimize", {
+        "season_key": "early_spring",
+        "target_price": 1e309,
+        "available_stems": inventory,
+    }),
+    ("POST", "/optimize", {
+        "season_key": "early_spring",
+        "target_price": 0,
+        "available_stems": inventory,
+    }),
+    ("POST", "/optimize", {
+        "season_key": "early_spring",
+        "target_price": 25,
+        "available_stems": {**inventory, "Filler": -5},
+    }),
+    ("POST", "/optimize", {
+        "season_key": "early_spring",
+        "target_price": 25,
+        "available_stems": {**inventory, "Filler": 1.7},
+    }),
+    # The bad job gets its own error; the first still runs
+    ("POST", "/optimize/batch", {"jobs": [
+        {"season_key": "early_spring", "target_price": 25, "available_stems": inventory},
+        {"season_key": "early_spring", "target_price": 1e309, "available_stems": inventory},
+    ]}),
+]
+
+for method, path, body in requests:
+    if method == "GET":
+        response = client.get(path)
+    else:
+        response = client.post(path, body)
+
+    print(f"{method} {path} -> {response.status} "
+          f"({response.headers['X-Compute-Time-Ms']} ms)")
+    print(response.json())
+    print()
+
+app.close()